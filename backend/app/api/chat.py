@@ -0,0 +1,169 @@
+import json
+from collections import Counter
+from functools import lru_cache
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.config import settings
+
+router = APIRouter()
+
+
+class ChatRequest(BaseModel):
+    message: str
+    context: list = []
+
+
+_chat_client = None
+
+
+def _get_chat_client():
+    """Lazily build one AsyncOpenAI client with a keep-alive pool, reused across requests."""
+    global _chat_client
+    if _chat_client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            verify=settings.verify_ssl,
+            timeout=settings.llm_timeout,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+        )
+        _chat_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url if settings.openai_base_url else None,
+            http_client=http_client,
+        )
+    return _chat_client
+
+
+@router.post("/chat")
+async def chat_with_context(request: ChatRequest):
+    """Chat endpoint that streams answers about validation results via SSE."""
+    context_summary = build_context_summary(request.context)
+
+    system_prompt = f"""You are an assistant for a markets trade validation system.
+
+Use only the validation context below:
+{context_summary}
+
+Keep responses concise and factual.
+If information is missing in context, say so clearly."""
+
+    async def token_generator():
+        try:
+            client = _get_chat_client()
+
+            stream = await client.chat.completions.create(
+                model=settings.llm_model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": request.message},
+                ],
+                max_tokens=500,
+                temperature=settings.llm_temperature,
+                stream=True,
+            )
+
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    yield f"data: {json.dumps({'type': 'token', 'text': token})}\n\n"
+
+            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        except Exception:
+            # Non-stream fallback: emit the canned response as a single event
+            fallback = generate_fallback_response(request.message, request.context)
+            yield f"data: {json.dumps({'type': 'token', 'text': fallback})}\n\n"
+            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+
+    return StreamingResponse(
+        token_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+def _context_key(validations: list) -> tuple:
+    """Hashable fingerprint of the chat context, for memoized stats."""
+    return tuple(
+        (
+            v.get("status"),
+            v.get("checker_decision"),
+            v.get("system_trade_id") or v.get("document_id") or v.get("id", "unknown"),
+        )
+        for v in validations
+    )
+
+
+@lru_cache(maxsize=256)
+def _compute_stats(context_key: tuple) -> tuple:
+    """Accumulate counts and example mismatches in a single pass over the context."""
+    statuses: Counter = Counter()
+    decisions: Counter = Counter()
+    mismatch_examples: List[str] = []
+
+    for status, decision, identifier in context_key:
+        statuses[status] += 1
+        decisions[decision] += 1
+        if status == "MISMATCH" and len(mismatch_examples) < 5:
+            mismatch_examples.append(identifier)
+
+    return statuses, decisions, tuple(mismatch_examples)
+
+
+@lru_cache(maxsize=64)
+def _render_summary(context_key: tuple) -> str:
+    """Rendered summary cached per context fingerprint for repeat chat turns."""
+    statuses, _, mismatch_examples = _compute_stats(context_key)
+
+    # Keep the prompt bounded: aggregate counts plus a handful of example
+    # mismatches, never the raw records (prefill cost is linear in tokens).
+    # Built as a parts list with one final join -- no intermediate strings.
+    parts = [
+        f"Total validations: {len(context_key)}",
+        f"Matched: {statuses['MATCH']}",
+        f"Partial: {statuses['PARTIAL']}",
+        f"Mismatched: {statuses['MISMATCH']}",
+    ]
+    if mismatch_examples:
+        parts.append(f"Example mismatches: {', '.join(mismatch_examples)}")
+    parts.append("")
+
+    return "\n".join(parts)
+
+
+def build_context_summary(validations: list) -> str:
+    if not validations:
+        return "No validation results available."
+
+    return _render_summary(_context_key(validations))
+
+
+def generate_fallback_response(message: str, validations: list) -> str:
+    text = message.lower()
+
+    statuses, decisions, _ = _compute_stats(_context_key(validations))
+
+    if "how many" in text and "match" in text:
+        return (
+            f"Out of {len(validations)} validations: {statuses['MATCH']} matched, "
+            f"{statuses['PARTIAL']} partial, {statuses['MISMATCH']} mismatched."
+        )
+
+    if "checker" in text:
+        return (
+            f"Checker decisions: approved={decisions['APPROVED']}, rejected={decisions['REJECTED']}, "
+            f"overridden={decisions['OVERRIDDEN']}."
+        )
+
+    return "Ask about match counts, mismatch trades, or checker decisions."
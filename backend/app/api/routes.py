@@ -1,18 +1,25 @@
 import asyncio
 import csv
+import hashlib
 import io
 import json
 import logging
 import os
-import queue
-import threading
-from datetime import datetime
+from collections import OrderedDict
+from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import aiofiles
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Request, UploadFile
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    ORJSONResponse,
+    Response,
+    StreamingResponse,
+)
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -22,6 +29,8 @@ from app.db import db
 from app.models import (
     CheckerActionRequest,
     Document,
+    ExtractedField,
+    ExtractedTrade,
     FolderScanRequest,
     MatchingRule,
     TRSTrade,
@@ -30,107 +39,13 @@ from app.models import (
     TradeImport,
     ValidationResult,
 )
-from app.models.schemas import generate_id
+from app.models.schemas import generate_id, now_iso
 from app.services import comparison_engine, evidence_processor, extractor
 
-router = APIRouter()
-
-
-# ============== Chat ==============
-
-
-class ChatRequest(BaseModel):
-    message: str
-    context: list = []
-
-
-class ChatResponse(BaseModel):
-    response: str
-
-
-@router.post("/chat", response_model=ChatResponse)
-async def chat_with_context(request: ChatRequest):
-    """Chat endpoint that answers questions about validation results."""
-    from openai import OpenAI
-
-    context_summary = build_context_summary(request.context)
-
-    system_prompt = f"""You are an assistant for a markets trade validation system.
-
-Use only the validation context below:
-{context_summary}
-
-Keep responses concise and factual.
-If information is missing in context, say so clearly."""
-
-    try:
-        import httpx
-        http_client = httpx.Client(
-            verify=settings.verify_ssl,
-            timeout=settings.llm_timeout,
-        )
-        client = OpenAI(
-            api_key=settings.openai_api_key,
-            base_url=settings.openai_base_url if settings.openai_base_url else None,
-            http_client=http_client,
-        )
-
-        response = client.chat.completions.create(
-            model=settings.llm_model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": request.message},
-            ],
-            max_tokens=500,
-            temperature=settings.llm_temperature,
-        )
-
-        return ChatResponse(response=response.choices[0].message.content)
-    except Exception:
-        return ChatResponse(response=generate_fallback_response(request.message, request.context))
-
-
-def build_context_summary(validations: list) -> str:
-    if not validations:
-        return "No validation results available."
-
-    total = len(validations)
-    matched = sum(1 for v in validations if v.get("status") == "MATCH")
-    partial = sum(1 for v in validations if v.get("status") == "PARTIAL")
-    mismatched = sum(1 for v in validations if v.get("status") == "MISMATCH")
-
-    return (
-        f"Total validations: {total}\n"
-        f"Matched: {matched}\n"
-        f"Partial: {partial}\n"
-        f"Mismatched: {mismatched}\n"
-    )
-
-
-def generate_fallback_response(message: str, validations: list) -> str:
-    text = message.lower()
+from app.api import chat
 
-    total = len(validations)
-    matched = sum(1 for v in validations if v.get("status") == "MATCH")
-    partial = sum(1 for v in validations if v.get("status") == "PARTIAL")
-    mismatched = sum(1 for v in validations if v.get("status") == "MISMATCH")
-
-    if "how many" in text and "match" in text:
-        return (
-            f"Out of {total} validations: {matched} matched, "
-            f"{partial} partial, {mismatched} mismatched."
-        )
-
-    if "checker" in text:
-        approved = sum(1 for v in validations if v.get("checker_decision") == "APPROVED")
-        rejected = sum(1 for v in validations if v.get("checker_decision") == "REJECTED")
-        overridden = sum(1 for v in validations if v.get("checker_decision") == "OVERRIDDEN")
-        return (
-            f"Checker decisions: approved={approved}, rejected={rejected}, "
-            f"overridden={overridden}."
-        )
-
-    return "Ask about match counts, mismatch trades, or checker decisions."
+router = APIRouter()
+router.include_router(chat.router)
 
 
 # ============== TRS Trades ==============
@@ -138,7 +53,8 @@ def generate_fallback_response(message: str, validations: list) -> str:
 
 @router.get("/trades/trs", response_model=List[TRSTrade])
 async def get_trs_trades():
-    return db.get_trs_trades()
+    # Rows were validated on insert; hand the stored dicts straight to orjson
+    return ORJSONResponse(db.get_trs_trades_raw())
 
 
 @router.get("/trades/trs/{trade_id}", response_model=TRSTrade)
@@ -183,49 +99,102 @@ async def import_trades(data: TradeImport):
 
 @router.get("/documents", response_model=List[Document])
 async def get_documents():
-    return db.get_documents()
+    # Returning a Response directly skips FastAPI's response_model
+    # re-validation pass; the data was validated when it was stored
+    return ORJSONResponse(db.get_documents_raw())
+
+
+_EXT_TO_TYPE: Dict[str, str] = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".msg": "msg",
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+    ".gif": "image",
+    ".bmp": "image",
+}
+
+
+_IMAGE_EXTS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".bmp"})
 
 
 def _resolve_upload_file_type(filename: str) -> str:
     ext = os.path.splitext(filename)[1].lower()
-    if ext == ".pdf":
-        return "pdf"
-    if ext == ".docx":
-        return "docx"
-    if ext == ".msg":
-        return "msg"
-    if ext in {".png", ".jpg", ".jpeg", ".gif", ".bmp"}:
-        return "image"
-    raise ValueError(f"File type not allowed: {ext}")
+    file_type = _EXT_TO_TYPE.get(ext)
+    if file_type is None:
+        raise ValueError(f"File type not allowed: {ext}")
+    return file_type
+
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+@lru_cache(maxsize=64)
+def _cached_ocr(file_path: str, mtime_ns: int, page: int):
+    """OCR results keyed on (path, mtime, page) so page flips in the viewer
+    don't re-run Vision; mtime invalidates the entry if the file changes."""
+    from app.services import vision_ocr
+
+    return vision_ocr.process_document(file_path, page_num=page)
+
+
+def _prewarm_ocr(file_path: str) -> None:
+    try:
+        _cached_ocr(file_path, os.stat(file_path).st_mtime_ns, 0)
+    except Exception:
+        # Pre-warming is best effort; the viewer will surface real failures
+        logger.debug("OCR pre-warm failed for %s", file_path, exc_info=True)
 
 
 @router.post("/documents/upload", response_model=Document)
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     try:
         file_type = _resolve_upload_file_type(file.filename)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    content = await file.read()
-    if len(content) > settings.max_file_size:
-        raise HTTPException(status_code=400, detail="File too large")
-
     doc_id = generate_id()
     ext = os.path.splitext(file.filename)[1].lower()
     file_path = os.path.join(settings.upload_dir, f"{doc_id}{ext}")
 
-    async with aiofiles.open(file_path, "wb") as output_file:
-        await output_file.write(content)
+    # Stream to disk in fixed-size chunks so memory stays O(chunk) and the
+    # event loop yields between writes for concurrent uploads. The SHA-256
+    # is folded into the same pass so dedup costs no extra read.
+    total_bytes = 0
+    hasher = hashlib.sha256()
+    try:
+        async with aiofiles.open(file_path, "wb") as output_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                total_bytes += len(chunk)
+                if total_bytes > settings.max_file_size:
+                    raise HTTPException(status_code=400, detail="File too large")
+                hasher.update(chunk)
+                await output_file.write(chunk)
+    except Exception:
+        if os.path.exists(file_path):
+            os.unlink(file_path)
+        raise
+
+    digest = hasher.hexdigest()
+    existing = db.get_document_by_sha(digest)
+    if existing:
+        os.unlink(file_path)
+        return existing
 
     doc = Document(
         id=doc_id,
         filename=file.filename,
         file_type=file_type,
         file_path=file_path,
+        content_sha256=digest,
         status="PENDING",
     )
 
     db.create_document(doc)
+    # Warm the viewer's OCR cache for page 0 after the response is sent
+    if file_type in {"pdf", "image"}:
+        background_tasks.add_task(_prewarm_ocr, file_path)
     return doc
 
 
@@ -237,33 +206,36 @@ async def scan_documents_folder(request: FolderScanRequest):
     if not folder_path.exists() or not folder_path.is_dir():
         raise HTTPException(status_code=400, detail=f"Folder not found: {folder}")
 
-    existing_paths = {doc.file_path for doc in db.get_documents() if doc.file_path}
+    existing_paths = db.get_document_paths()
     created: List[Document] = []
     skipped: List[str] = []
 
-    for file_path in sorted(folder_path.iterdir()):
-        if not file_path.is_file():
-            continue
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
 
-        try:
-            file_type = _resolve_upload_file_type(file_path.name)
-        except ValueError:
-            skipped.append(f"Unsupported: {file_path.name}")
-            continue
+            try:
+                file_type = _resolve_upload_file_type(entry.name)
+            except ValueError:
+                skipped.append(f"Unsupported: {entry.name}")
+                continue
 
-        if str(file_path) in existing_paths:
-            skipped.append(f"Already ingested: {file_path.name}")
-            continue
+            if entry.path in existing_paths:
+                skipped.append(f"Already ingested: {entry.name}")
+                continue
 
-        doc = Document(
-            id=generate_id(),
-            filename=file_path.name,
-            file_type=file_type,
-            file_path=str(file_path),
-            status="PENDING",
-        )
-        db.create_document(doc)
-        created.append(doc)
+            doc = Document(
+                id=generate_id(),
+                filename=entry.name,
+                file_type=file_type,
+                file_path=entry.path,
+                status="PENDING",
+            )
+            created.append(doc)
+
+    # One multi-row insert instead of a DB round-trip per file
+    db.bulk_create_documents(created)
 
     return {
         "folder": str(folder_path),
@@ -357,10 +329,10 @@ async def content_extract_document(doc_id: str):
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    db.update_document(doc_id, {"status": "PROCESSING"})
-
+    # No client polls the interim PROCESSING state, so skip that extra
+    # full rewrite of database.json and write the terminal status once
     try:
-        evidence = evidence_processor.prepare_document_content(doc)
+        evidence = await asyncio.to_thread(evidence_processor.prepare_document_content, doc)
         content_extraction = _build_content_extraction_result(evidence, doc)
 
         updated_doc = db.update_document(
@@ -377,14 +349,39 @@ async def content_extract_document(doc_id: str):
         raise HTTPException(status_code=500, detail=f"Content extraction failed: {exc}") from exc
 
 
+# LLM extraction results keyed by content digest + schema version. This
+# prototype has no Redis; an in-process LRU gives the same short-circuit
+# for repeated extraction of identical evidence.
+_EXTRACTION_CACHE: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+_EXTRACTION_CACHE_MAX = 128
+
+
+def _extraction_cache_key(doc: Document, content: str) -> str:
+    digest = doc.content_sha256 or hashlib.sha256(content.encode()).hexdigest()
+    return f"extract:{digest}:{extractor.schema.get('version', 'v1')}"
+
+
+def _extraction_cache_get(key: str) -> "Optional[Dict[str, object]]":
+    cached = _EXTRACTION_CACHE.get(key)
+    if cached is None:
+        return None
+    _EXTRACTION_CACHE.move_to_end(key)
+    return deepcopy(cached)
+
+
+def _extraction_cache_put(key: str, payload: Dict[str, object]) -> None:
+    _EXTRACTION_CACHE[key] = deepcopy(payload)
+    _EXTRACTION_CACHE.move_to_end(key)
+    while len(_EXTRACTION_CACHE) > _EXTRACTION_CACHE_MAX:
+        _EXTRACTION_CACHE.popitem(last=False)
+
+
 @router.post("/documents/{doc_id}/extract", response_model=Document)
 async def extract_document(doc_id: str):
     doc = db.get_document(doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    db.update_document(doc_id, {"status": "PROCESSING"})
-
     try:
         # If content was already extracted (pipeline flow), reuse it
         if doc.content and doc.content.strip():
@@ -402,26 +399,34 @@ async def extract_document(doc_id: str):
                 if os.path.isdir(att_dir):
                     for fname in sorted(os.listdir(att_dir)):
                         ext = os.path.splitext(fname)[1].lower()
-                        if ext in {".png", ".jpg", ".jpeg", ".gif", ".bmp"}:
+                        if ext in _IMAGE_EXTS:
                             image_paths.append(os.path.join(att_dir, fname))
                     if image_paths:
                         image_path = image_paths[0]
             if doc.content_extraction:
                 metadata = doc.content_extraction.get("metadata", {})
         else:
-            evidence = evidence_processor.prepare_document_content(doc)
+            # PDF parsing / OCR is synchronous and heavy; keep it off the event loop
+            evidence = await asyncio.to_thread(evidence_processor.prepare_document_content, doc)
             content = evidence.content
             image_path = evidence.image_path
             image_paths = evidence.image_paths
             metadata = evidence.metadata
 
-        extracted_data = await extractor.extract_trade_data(
-            content=content,
-            image_path=image_path,
-            image_paths=image_paths,
-        )
+        cache_key = _extraction_cache_key(doc, content)
+        extracted_payload = _extraction_cache_get(cache_key)
+
+        if extracted_payload is None:
+            extracted_data = await extractor.extract_trade_data(
+                content=content,
+                image_path=image_path,
+                image_paths=image_paths,
+            )
+            extracted_payload = extracted_data.model_dump()
+            _extraction_cache_put(cache_key, extracted_payload)
+        else:
+            logger.info("Extraction cache hit for %s", cache_key)
 
-        extracted_payload = extracted_data.model_dump()
         extracted_payload["evidence_metadata"] = metadata
 
         updated_doc = db.update_document(
@@ -434,7 +439,7 @@ async def extract_document(doc_id: str):
             },
         )
 
-        return updated_doc
+        return ORJSONResponse(updated_doc.model_dump())
     except Exception as exc:
         db.update_document(doc_id, {"status": "ERROR", "processing_warnings": [str(exc)]})
         raise HTTPException(status_code=500, detail=f"Extraction failed: {exc}") from exc
@@ -447,8 +452,6 @@ async def extract_document_stream(doc_id: str):
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    db.update_document(doc_id, {"status": "PROCESSING"})
-
     # Prepare content (same logic as /extract)
     if doc.content and doc.content.strip():
         content = doc.content
@@ -463,58 +466,50 @@ async def extract_document_stream(doc_id: str):
             if os.path.isdir(att_dir):
                 for fname in sorted(os.listdir(att_dir)):
                     ext = os.path.splitext(fname)[1].lower()
-                    if ext in {".png", ".jpg", ".jpeg", ".gif", ".bmp"}:
+                    if ext in _IMAGE_EXTS:
                         image_paths.append(os.path.join(att_dir, fname))
                 if image_paths:
                     image_path = image_paths[0]
         if doc.content_extraction:
             metadata = doc.content_extraction.get("metadata", {})
     else:
-        evidence = evidence_processor.prepare_document_content(doc)
+        evidence = await asyncio.to_thread(evidence_processor.prepare_document_content, doc)
         content = evidence.content
         image_path = evidence.image_path
         image_paths = evidence.image_paths
         metadata = evidence.metadata
 
-    # Thread-safe queue for progress events
-    progress_queue: queue.Queue = queue.Queue()
+    # Progress events flow through an asyncio queue on the serving loop.
+    # Extraction must run on this loop too: the extractor singleton's
+    # AsyncOpenAI connection pool and in-flight semaphore are loop-bound,
+    # so driving them from a throwaway loop in a thread would leak dead
+    # keep-alive transports into requests served on the main loop.
+    progress_queue: asyncio.Queue = asyncio.Queue()
 
     def on_progress(event: dict):
-        progress_queue.put(event)
+        progress_queue.put_nowait(event)
 
-    def run_extraction():
-        """Run extraction in a thread (OpenAI client is synchronous)."""
-        import asyncio
-        loop = asyncio.new_event_loop()
+    async def run_extraction():
+        """Run extraction as a task on the serving loop, feeding the progress queue."""
         try:
-            result = loop.run_until_complete(
-                extractor.extract_trade_data(
-                    content=content,
-                    image_path=image_path,
-                    image_paths=image_paths,
-                    on_progress=on_progress,
-                )
+            result = await extractor.extract_trade_data(
+                content=content,
+                image_path=image_path,
+                image_paths=image_paths,
+                on_progress=on_progress,
             )
-            progress_queue.put({"type": "result", "data": result})
+            progress_queue.put_nowait({"type": "result", "data": result})
         except Exception as exc:
             logger.error("Streaming extraction failed: %s", exc)
-            progress_queue.put({"type": "error", "message": str(exc)})
+            progress_queue.put_nowait({"type": "error", "message": str(exc)})
         finally:
-            progress_queue.put(None)  # sentinel
-            loop.close()
+            progress_queue.put_nowait(None)  # sentinel
 
     async def event_generator():
-        # Start extraction in background thread
-        thread = threading.Thread(target=run_extraction, daemon=True)
-        thread.start()
+        extraction_task = asyncio.create_task(run_extraction())
 
         while True:
-            # Poll the queue without blocking the event loop
-            try:
-                event = progress_queue.get_nowait()
-            except queue.Empty:
-                await asyncio.sleep(0.05)
-                continue
+            event = await progress_queue.get()
 
             if event is None:
                 # Done
@@ -552,7 +547,7 @@ async def extract_document_stream(doc_id: str):
             elif event["type"] == "complete":
                 yield f"data: {json.dumps({'type': 'complete', 'total_chars': event['total_chars'], 'elapsed': event['elapsed'], 'tokens_per_sec': event['tokens_per_sec']})}\n\n"
 
-        thread.join(timeout=5)
+        await extraction_task
 
     return StreamingResponse(
         event_generator(),
@@ -580,7 +575,8 @@ async def get_document_viewer_data(doc_id: str, page: int = 0):
         raise HTTPException(status_code=400, detail="Viewer supports only PDF/image documents")
 
     try:
-        ocr_result = vision_ocr.process_document(doc.file_path, page_num=page)
+        mtime_ns = os.stat(doc.file_path).st_mtime_ns
+        ocr_result = await asyncio.to_thread(_cached_ocr, doc.file_path, mtime_ns, page)
 
         field_coordinates: Dict[str, Dict] = {}
         if doc.extracted_data and doc.extracted_data.get("fields"):
@@ -589,27 +585,19 @@ async def get_document_viewer_data(doc_id: str, page: int = 0):
                 ocr_result.words,
             )
 
-        return {
+        # orjson serializes the OCRWord dataclasses directly, so a dense page
+        # doesn't pay a per-word dict copy before encoding
+        return ORJSONResponse({
             "document_id": doc_id,
             "filename": doc.filename,
             "page": page,
             "image_base64": ocr_result.image_base64,
             "image_width": ocr_result.image_width,
             "image_height": ocr_result.image_height,
-            "ocr_words": [
-                {
-                    "text": word.text,
-                    "x": word.x,
-                    "y": word.y,
-                    "width": word.width,
-                    "height": word.height,
-                    "confidence": word.confidence,
-                }
-                for word in ocr_result.words
-            ],
+            "ocr_words": ocr_result.words,
             "field_coordinates": field_coordinates,
             "extracted_data": doc.extracted_data,
-        }
+        })
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to process document: {exc}") from exc
 
@@ -634,7 +622,7 @@ async def get_document_attachments(doc_id: str):
         if not os.path.isfile(file_path):
             continue
         ext = os.path.splitext(filename)[1].lower()
-        is_image = ext in {".png", ".jpg", ".jpeg", ".gif", ".bmp"}
+        is_image = ext in _IMAGE_EXTS
         # Strip the index prefix (e.g. "0_filename.docx" -> "filename.docx")
         display_name = filename.split("_", 1)[1] if "_" in filename else filename
         attachments.append({
@@ -671,79 +659,154 @@ async def serve_attachment(doc_id: str, filename: str):
     return FileResponse(file_path, filename=filename)
 
 
-@router.post("/documents/{doc_id}/validate", response_model=Document)
-async def validate_document(doc_id: str):
-    from app.models import ExtractedField, ExtractedTrade
+def _build_extracted_trade(doc: Document) -> ExtractedTrade:
+    # The stored fields came out of our own model_dump(), so rebuild them
+    # with model_construct and skip pydantic validation entirely
+    _EF = ExtractedField.model_construct
+    fields = {
+        key: _EF(**value) if isinstance(value, dict) else _EF(value=value, confidence=0.5)
+        for key, value in doc.extracted_data.get("fields", {}).items()
+    }
 
-    doc = db.get_document(doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
+    return ExtractedTrade.model_construct(
+        trade_type="TRS",
+        schema_version=doc.extracted_data.get("schema_version"),
+        fields=fields,
+        raw_text=doc.extracted_data.get("raw_text"),
+    )
 
-    if not doc.extracted_data:
-        raise HTTPException(status_code=400, detail="Document has not been extracted yet")
 
-    try:
-        extracted = ExtractedTrade(
-            trade_type="TRS",
-            schema_version=doc.extracted_data.get("schema_version"),
-            fields={
-                key: ExtractedField(**value)
-                if isinstance(value, dict)
-                else ExtractedField(value=value, confidence=0.5)
-                for key, value in doc.extracted_data.get("fields", {}).items()
-            },
-            raw_text=doc.extracted_data.get("raw_text"),
-        )
+# Rules change only via PUT /rules; track a version so validations skip
+# re-installing an unchanged rule set on the engine
+_rules_version = 0
+_installed_rules_version = -1
+
 
+def _ensure_engine_rules() -> None:
+    global _installed_rules_version
+    if _installed_rules_version != _rules_version:
         comparison_engine.set_rules(db.get_matching_rules())
+        _installed_rules_version = _rules_version
+
+
+def _run_validation(doc: Document, trs_trades: List[TRSTrade]) -> tuple:
+    """Match one extracted document against the trade book and apply auto-pass.
 
-        validation_result = comparison_engine.find_best_match(
+    Returns the stored model together with its dumped payload so callers
+    persist and respond from one model_dump() pass.
+    """
+    extracted = _build_extracted_trade(doc)
+
+    validation_result = comparison_engine.find_best_match(
+        extracted=extracted,
+        trs_trades=trs_trades,
+        document_id=doc.id,
+    )
+
+    if not validation_result:
+        validation_result = comparison_engine.build_unmatched_result(
             extracted=extracted,
-            trs_trades=db.get_trs_trades(),
-            document_id=doc_id,
+            document_id=doc.id,
         )
 
-        if not validation_result:
-            validation_result = comparison_engine.build_unmatched_result(
-                extracted=extracted,
-                document_id=doc_id,
-            )
+    machine_conf = validation_result.machine_confidence or 0.0
+    auto_passed = validation_result.status == "MATCH" and machine_conf >= settings.auto_pass_threshold
 
-        machine_conf = validation_result.machine_confidence or 0.0
-        auto_passed = validation_result.status == "MATCH" and machine_conf >= settings.auto_pass_threshold
+    validation_payload = validation_result.model_dump()
+    validation_payload["auto_passed"] = auto_passed
+    if auto_passed:
+        validation_payload["checker_decision"] = "APPROVED"
+        validation_payload["checked_at"] = now_iso()
+        validation_payload["checker_comment"] = (
+            f"Auto-approved by threshold >= {settings.auto_pass_threshold:.2f}"
+        )
+
+    return ValidationResult(**validation_payload), validation_payload
 
-        validation_payload = validation_result.model_dump()
-        validation_payload["auto_passed"] = auto_passed
-        if auto_passed:
-            validation_payload["checker_decision"] = "APPROVED"
-            validation_payload["checked_at"] = datetime.now().isoformat()
-            validation_payload["checker_comment"] = (
-                f"Auto-approved by threshold >= {settings.auto_pass_threshold:.2f}"
-            )
 
-        stored_result = ValidationResult(**validation_payload)
+@router.post("/documents/{doc_id}/validate", response_model=Document)
+async def validate_document(doc_id: str):
+    doc = db.get_document(doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if not doc.extracted_data:
+        raise HTTPException(status_code=400, detail="Document has not been extracted yet")
+
+    try:
+        _ensure_engine_rules()
+
+        stored_result, result_payload = _run_validation(doc, db.get_trs_trades())
         db.create_validation_result(stored_result)
 
         updated_doc = db.update_document(
             doc_id,
-            {"status": "VALIDATED", "validation_result": stored_result.model_dump()},
+            {"status": "VALIDATED", "validation_result": result_payload},
         )
-        return updated_doc
+        return ORJSONResponse(updated_doc.model_dump())
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Validation failed: {exc}") from exc
 
 
+class BulkValidateRequest(BaseModel):
+    doc_ids: List[str]
+
+
+@router.post("/documents/validate/bulk")
+async def validate_documents_bulk(request: BulkValidateRequest):
+    """Validate many documents while loading rules and the trade book once."""
+    _ensure_engine_rules()
+    trs_trades = db.get_trs_trades()
+
+    results: List[ValidationResult] = []
+    doc_updates: Dict[str, Dict[str, object]] = {}
+    errors: Dict[str, str] = {}
+
+    for doc_id in request.doc_ids:
+        doc = db.get_document(doc_id)
+        if not doc:
+            errors[doc_id] = "Document not found"
+            continue
+        if not doc.extracted_data:
+            errors[doc_id] = "Document has not been extracted yet"
+            continue
+
+        try:
+            stored_result, result_payload = _run_validation(doc, trs_trades)
+        except Exception as exc:
+            errors[doc_id] = f"Validation failed: {exc}"
+            continue
+
+        results.append(stored_result)
+        doc_updates[doc_id] = {
+            "status": "VALIDATED",
+            "validation_result": result_payload,
+        }
+
+    db.create_validation_results(results)
+    db.bulk_update_documents(doc_updates)
+
+    return {
+        "validated_count": len(results),
+        "validation_ids": [result.id for result in results],
+        "errors": errors,
+    }
+
+
 # ============== Matching Rules ==============
 
 
 @router.get("/rules", response_model=List[MatchingRule])
 async def get_matching_rules():
-    return db.get_matching_rules()
+    return ORJSONResponse(db.get_matching_rules_raw())
 
 
 @router.put("/rules", response_model=List[MatchingRule])
 async def save_matching_rules(rules: List[MatchingRule]):
-    return db.save_matching_rules(rules)
+    global _rules_version
+    saved = db.save_matching_rules(rules)
+    _rules_version += 1
+    return saved
 
 
 # ============== Validation Results ==============
@@ -751,7 +814,17 @@ async def save_matching_rules(rules: List[MatchingRule]):
 
 @router.get("/validations", response_model=List[ValidationResult])
 async def get_validation_results():
-    return db.get_validation_results()
+    return ORJSONResponse(db.get_validation_results_raw())
+
+
+@router.get("/validations/summary")
+async def get_validation_summary():
+    """Status and checker-decision totals without scanning the result list."""
+    counts = db.get_validation_status_counts()
+    return {
+        "status_counts": dict(counts["status"]),
+        "decision_counts": dict(counts["checker_decision"]),
+    }
 
 
 @router.post("/validations/{validation_id}/checker", response_model=ValidationResult)
@@ -761,7 +834,7 @@ async def checker_action(validation_id: str, request: CheckerActionRequest):
         raise HTTPException(status_code=404, detail="Validation not found")
 
     updates: Dict[str, object] = {
-        "checked_at": datetime.now().isoformat(),
+        "checked_at": now_iso(),
         "checker_comment": request.comment,
     }
 
@@ -794,60 +867,90 @@ async def checker_action(validation_id: str, request: CheckerActionRequest):
 async def export_validation_report():
     validations = db.get_validation_results()
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "validation_id",
-            "document_id",
-            "machine_status",
-            "checker_decision",
-            "system_trade_id",
-            "party_a",
-            "party_b",
-            "trade_date",
-            "effective_date",
-            "scheduled_termination_date",
-            "local_currency",
-            "notional_amount",
-            "machine_confidence",
-            "auto_passed",
-            "checked_at",
-            "checker_comment",
-            "created_at",
-        ]
-    )
+    header = [
+        "validation_id",
+        "document_id",
+        "machine_status",
+        "checker_decision",
+        "system_trade_id",
+        "party_a",
+        "party_b",
+        "trade_date",
+        "effective_date",
+        "scheduled_termination_date",
+        "local_currency",
+        "notional_amount",
+        "machine_confidence",
+        "auto_passed",
+        "checked_at",
+        "checker_comment",
+        "created_at",
+    ]
+
+    def csv_rows():
+        # writerows is implemented in C; render in batches through one
+        # reused buffer so peak memory stays O(batch)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        batch_size = 1024
+
+        def render(rows):
+            buffer.truncate(0)
+            buffer.seek(0)
+            writer.writerows(rows)
+            return buffer.getvalue()
+
+        yield render([header])
+
+        batch = []
+        for result in validations:
+            batch.append(
+                (
+                    result.id,
+                    result.document_id,
+                    result.status,
+                    result.checker_decision,
+                    result.system_trade_id,
+                    result.party_a or "",
+                    result.party_b or "",
+                    result.trade_date or "",
+                    result.effective_date or "",
+                    result.scheduled_termination_date or "",
+                    result.local_currency or "",
+                    result.notional_amount or "",
+                    result.machine_confidence or "",
+                    result.auto_passed,
+                    result.checked_at or "",
+                    result.checker_comment or "",
+                    result.created_at,
+                )
+            )
+            if len(batch) >= batch_size:
+                yield render(batch)
+                batch.clear()
 
-    for result in validations:
-        writer.writerow(
-            [
-                result.id,
-                result.document_id,
-                result.status,
-                result.checker_decision,
-                result.system_trade_id,
-                result.party_a or "",
-                result.party_b or "",
-                result.trade_date or "",
-                result.effective_date or "",
-                result.scheduled_termination_date or "",
-                result.local_currency or "",
-                result.notional_amount or "",
-                result.machine_confidence or "",
-                result.auto_passed,
-                result.checked_at or "",
-                result.checker_comment or "",
-                result.created_at,
-            ]
-        )
+        if batch:
+            yield render(batch)
 
-    return Response(
-        content=output.getvalue(),
+    return StreamingResponse(
+        csv_rows(),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=trs_validation_report.csv"},
     )
 
 
+# Schema is static per deployment; a strong ETag lets clients revalidate with a 304
+_SCHEMA_ETAG = hashlib.sha256(
+    json.dumps(extractor.schema, sort_keys=True).encode()
+).hexdigest()
+
+
 @router.get("/schema/trs")
-async def get_trs_schema():
-    return extractor.schema
+async def get_trs_schema(request: Request):
+    if request.headers.get("if-none-match") == _SCHEMA_ETAG:
+        return Response(status_code=304)
+
+    return JSONResponse(
+        extractor.schema,
+        headers={"ETag": _SCHEMA_ETAG, "Cache-Control": "public, max-age=300"},
+    )
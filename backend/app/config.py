@@ -1,4 +1,3 @@
-import os
 from typing import Optional
 
 from pydantic_settings import BaseSettings
@@ -18,6 +17,7 @@ class Settings(BaseSettings):
     llm_temperature: float = 0.0
     llm_timeout: int = 120
     llm_send_images: bool = False  # Set True only if your LLM supports multipart image_url
+    llm_max_concurrent_requests: int = 4  # In-flight LLM request cap; tune to API rate limits
 
     # Data & file paths
     database_path: str = "../data/database.json"
@@ -44,6 +44,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
-os.makedirs(settings.upload_dir, exist_ok=True)
-os.makedirs(settings.ingest_scan_dir, exist_ok=True)
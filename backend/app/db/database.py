@@ -1,7 +1,13 @@
-import json
+import atexit
+import mmap
 import os
+import threading
+from collections import Counter
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, ClassVar, Dict, List, Optional, Set
+
+import orjson
+from pydantic import TypeAdapter
 
 from app.models import (
     Document,
@@ -10,16 +16,18 @@ from app.models import (
     TRSTradeCreate,
     ValidationResult,
 )
-from app.models.schemas import generate_id
+from app.models.schemas import generate_id, generate_ids
 from app.config import settings
 
 
-DB_DEFAULTS: Dict[str, Any] = {
-    "trs_trades": [],
-    "documents": [],
-    "matching_rules": [],
-    "validation_results": [],
-}
+TABLES = ("trs_trades", "documents", "matching_rules", "validation_results")
+
+# List adapters dispatch whole-table validation in pydantic-core instead of
+# one Python-level constructor call per row
+_TRS_LIST = TypeAdapter(List[TRSTrade])
+_DOCUMENT_LIST = TypeAdapter(List[Document])
+_RULE_LIST = TypeAdapter(List[MatchingRule])
+_VALIDATION_LIST = TypeAdapter(List[ValidationResult])
 
 
 def to_dict(obj: Any) -> Dict[str, Any]:
@@ -32,162 +40,404 @@ def to_dict(obj: Any) -> Dict[str, Any]:
 
 
 class JSONDatabase:
-    """Simple JSON file-based database for the prototype."""
+    """Simple JSON file-based database for the prototype.
+
+    Each table lives in its own file next to the legacy combined
+    database.json, so a write rewrites only the touched collection; a
+    legacy combined file is split into per-table files on first use.
+    """
+
+    # Paths already prepared this process; repeated instantiation (tests,
+    # scripts importing the module twice) skips the stat/mkdir syscalls
+    _initialized_paths: ClassVar[Set[str]] = set()
 
     def __init__(self, db_path: str = "../data/database.json"):
         self.db_path = db_path
+        base_dir = os.path.dirname(db_path) or "."
+        self._paths = {table: os.path.join(base_dir, f"{table}.json") for table in TABLES}
+        # Parsed per-table caches; _load_one only re-reads a file whose
+        # mtime moved, so reads cost a stat instead of a full parse
+        self._cache: Dict[str, Optional[List[Dict[str, Any]]]] = {t: None for t in TABLES}
+        self._mtimes: Dict[str, int] = {t: -1 for t in TABLES}
+        # Lazily built (table, field) -> {value: position} row indexes so
+        # single-record lookups skip the linear scan
+        self._indexes: Dict[tuple, Dict[str, int]] = {}
+        # Incrementally maintained (status, checker_decision) counters;
+        # rebuilt lazily after a cold start or external file change
+        self._validation_counts: Optional[Dict[str, Counter]] = None
+        # Deserialized model lists for read-heavy, write-rare tables,
+        # invalidated by their mutators
+        self._trs_cache: Optional[List[TRSTrade]] = None
+        self._rules_cache: Optional[List[MatchingRule]] = None
+        # Debounced flusher: mutators update the in-memory rows and mark the
+        # table dirty; one timer per burst writes the files shortly after
+        self._flush_lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._flush_timer: Optional[threading.Timer] = None
         self._ensure_db_exists()
 
     def _ensure_db_exists(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        if not os.path.exists(self.db_path):
-            self._save(DB_DEFAULTS.copy())
-
-    def _load(self) -> Dict[str, Any]:
-        with open(self.db_path, "r") as f:
-            data = json.load(f)
-
-        changed = False
-        for key, value in DB_DEFAULTS.items():
-            if key not in data:
-                data[key] = value.copy() if isinstance(value, list) else value
-                changed = True
-
-        if changed:
-            self._save(data)
-
-        return data
-
-    def _save(self, data: Dict[str, Any]):
-        with open(self.db_path, "w") as f:
-            json.dump(data, f, indent=2)
+        if self.db_path in JSONDatabase._initialized_paths:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        if os.path.exists(self.db_path):
+            self._migrate_combined_file()
+        JSONDatabase._initialized_paths.add(self.db_path)
+
+    def _migrate_combined_file(self):
+        """Split a legacy combined database.json into per-table files."""
+        with open(self.db_path, "rb") as f:
+            data = orjson.loads(f.read())
+        for table in TABLES:
+            if not os.path.exists(self._paths[table]):
+                self._write_table(table, data.get(table, []))
+        os.replace(self.db_path, f"{self.db_path}.migrated")
+
+    def _invalidate_derived(self, table: str) -> None:
+        self._invalidate_indexes(table)
+        if table == "trs_trades":
+            self._trs_cache = None
+        elif table == "matching_rules":
+            self._rules_cache = None
+        elif table == "validation_results":
+            self._validation_counts = None
+
+    # Below this size the bytes fit comfortably in one read; mmap setup
+    # would cost more than the copy it saves
+    MMAP_THRESHOLD_BYTES = 1 << 20
+
+    def _load_one(self, table: str) -> List[Dict[str, Any]]:
+        path = self._paths[table]
+        try:
+            stat = os.stat(path)
+            mtime_ns = stat.st_mtime_ns
+        except FileNotFoundError:
+            rows = self._cache[table]
+            if rows is None:
+                rows = []
+                self._cache[table] = rows
+            return rows
+
+        if self._cache[table] is not None and mtime_ns == self._mtimes[table]:
+            return self._cache[table]
+
+        with open(path, "rb") as f:
+            if stat.st_size > self.MMAP_THRESHOLD_BYTES:
+                # Hand the kernel's pages to orjson directly instead of
+                # copying the whole file into a bytes object first
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    rows = orjson.loads(memoryview(mm))
+                finally:
+                    mm.close()
+            else:
+                rows = orjson.loads(f.read())
+
+        self._cache[table] = rows
+        self._mtimes[table] = mtime_ns
+        # The file changed underneath us; derived state is stale
+        self._invalidate_derived(table)
+        return rows
+
+    FLUSH_DELAY_SECONDS = 0.05
+
+    def _write_table(self, table: str, rows: List[Dict[str, Any]]):
+        # Write-to-temp + rename keeps readers from ever seeing a torn file;
+        # the single fsync bounds data loss to the last completed save
+        path = self._paths[table]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            # Compact encoding: the files are machine-consumed on the hot
+            # path; export_pretty exists for human inspection
+            f.write(orjson.dumps(rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._cache[table] = rows
+        self._mtimes[table] = os.stat(path).st_mtime_ns
+
+    def _save_one(self, table: str, rows: List[Dict[str, Any]]):
+        """Adopt rows as the table's state and schedule a coalesced write.
+
+        The in-memory cache is authoritative once a mutation lands, so a
+        burst of writes (folder scan, bulk validate) costs one file write
+        per table per flush window instead of one per request.
+        """
+        with self._flush_lock:
+            self._cache[table] = rows
+            self._dirty.add(table)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_DELAY_SECONDS, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write every dirty table now; used by the debounce timer and shutdown."""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            while self._dirty:
+                table = self._dirty.pop()
+                self._write_table(table, self._cache[table])
+
+    def export_pretty(self, table: str, path: str) -> None:
+        """Write an indented copy of one table for human inspection."""
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(self._load_one(table), option=orjson.OPT_INDENT_2))
+
+    def _row_index(self, rows: List[Dict[str, Any]], table: str, field: str = "id") -> Dict[str, int]:
+        key = (table, field)
+        index = self._indexes.get(key)
+        if index is None:
+            index = {
+                row[field]: i
+                for i, row in enumerate(rows)
+                if row.get(field) is not None
+            }
+            self._indexes[key] = index
+        return index
+
+    def _invalidate_indexes(self, table: str) -> None:
+        for key in [k for k in self._indexes if k[0] == table]:
+            del self._indexes[key]
 
     # TRS Trades
     def get_trs_trades(self) -> List[TRSTrade]:
-        data = self._load()
-        return [TRSTrade(**t) for t in data.get("trs_trades", [])]
+        if self._trs_cache is None:
+            self._trs_cache = _TRS_LIST.validate_python(self._load_one("trs_trades"))
+        return self._trs_cache
+
+    def get_trs_trades_raw(self) -> List[Dict[str, Any]]:
+        """Stored trade rows as-is, for response paths that re-encode anyway."""
+        return self._load_one("trs_trades")
 
     def get_trs_trade(self, trade_id: str) -> Optional[TRSTrade]:
-        trades = self.get_trs_trades()
-        for trade in trades:
-            if trade.id == trade_id or trade.trade_id == trade_id:
-                return trade
-        return None
+        rows = self._load_one("trs_trades")
+        i = self._row_index(rows, "trs_trades").get(trade_id)
+        if i is None:
+            i = self._row_index(rows, "trs_trades", "trade_id").get(trade_id)
+        if i is None:
+            return None
+        return TRSTrade(**rows[i])
 
     def create_trs_trade(self, trade: TRSTradeCreate) -> TRSTrade:
-        data = self._load()
-        new_trade = TRSTrade(
-            id=generate_id(),
-            **to_dict(trade),
-            created_at=datetime.now().isoformat(),
-            updated_at=datetime.now().isoformat(),
-        )
-        data["trs_trades"].append(to_dict(new_trade))
-        self._save(data)
-        return new_trade
+        rows = self._load_one("trs_trades")
+        # The incoming model is already validated, so build the stored dict
+        # once and model_construct the return value instead of paying a
+        # second validation plus a second full dump
+        payload = to_dict(trade)
+        payload["id"] = generate_id()
+        payload["created_at"] = payload["updated_at"] = datetime.now().isoformat()
+        rows.append(payload)
+        self._save_one("trs_trades", rows)
+        self._trs_cache = None
+        self._invalidate_indexes("trs_trades")
+        return TRSTrade.model_construct(**payload)
 
     def update_trs_trade(self, trade_id: str, trade: TRSTradeCreate) -> Optional[TRSTrade]:
-        data = self._load()
-        for i, existing in enumerate(data["trs_trades"]):
-            if existing["id"] == trade_id:
-                updated = TRSTrade(
-                    id=trade_id,
-                    **to_dict(trade),
-                    created_at=existing.get("created_at", datetime.now().isoformat()),
-                    updated_at=datetime.now().isoformat(),
-                )
-                data["trs_trades"][i] = to_dict(updated)
-                self._save(data)
-                return updated
-        return None
+        rows = self._load_one("trs_trades")
+        i = self._row_index(rows, "trs_trades").get(trade_id)
+        if i is None:
+            return None
+        existing = rows[i]
+        payload = to_dict(trade)
+        payload["id"] = trade_id
+        payload["created_at"] = existing.get("created_at", datetime.now().isoformat())
+        payload["updated_at"] = datetime.now().isoformat()
+        rows[i] = payload
+        self._save_one("trs_trades", rows)
+        self._trs_cache = None
+        # trade_id is updatable and indexed, so positions may now lie
+        self._invalidate_indexes("trs_trades")
+        return TRSTrade.model_construct(**payload)
 
     def delete_trs_trade(self, trade_id: str) -> bool:
-        data = self._load()
-        original_len = len(data["trs_trades"])
-        data["trs_trades"] = [t for t in data["trs_trades"] if t["id"] != trade_id]
-        if len(data["trs_trades"]) < original_len:
-            self._save(data)
-            return True
-        return False
+        rows = self._load_one("trs_trades")
+        i = self._row_index(rows, "trs_trades").get(trade_id)
+        if i is None:
+            return False
+        rows.pop(i)
+        self._save_one("trs_trades", rows)
+        self._trs_cache = None
+        self._invalidate_indexes("trs_trades")
+        return True
 
     # Documents
     def get_documents(self) -> List[Document]:
-        data = self._load()
-        return [Document(**d) for d in data.get("documents", [])]
+        return _DOCUMENT_LIST.validate_python(self._load_one("documents"))
+
+    def get_documents_raw(self) -> List[Dict[str, Any]]:
+        """Stored document rows as-is, for response paths that re-encode anyway."""
+        return self._load_one("documents")
+
+    def get_document_paths(self) -> Set[str]:
+        """File paths of already-ingested documents, without model instantiation."""
+        return {d["file_path"] for d in self._load_one("documents") if d.get("file_path")}
+
+    def get_document_by_sha(self, content_sha256: str) -> Optional[Document]:
+        rows = self._load_one("documents")
+        i = self._row_index(rows, "documents", "content_sha256").get(content_sha256)
+        if i is None:
+            return None
+        return Document(**rows[i])
 
     def get_document(self, doc_id: str) -> Optional[Document]:
-        docs = self.get_documents()
-        for doc in docs:
-            if doc.id == doc_id:
-                return doc
-        return None
+        rows = self._load_one("documents")
+        i = self._row_index(rows, "documents").get(doc_id)
+        if i is None:
+            return None
+        return Document(**rows[i])
 
     def create_document(self, doc: Document) -> Document:
-        data = self._load()
-        data["documents"].append(to_dict(doc))
-        self._save(data)
+        rows = self._load_one("documents")
+        rows.append(to_dict(doc))
+        self._save_one("documents", rows)
+        self._invalidate_indexes("documents")
         return doc
 
+    def bulk_create_documents(self, docs: List[Document]) -> List[Document]:
+        """Insert many documents with a single load/save cycle."""
+        if not docs:
+            return docs
+        rows = self._load_one("documents")
+        rows.extend(to_dict(doc) for doc in docs)
+        self._save_one("documents", rows)
+        self._invalidate_indexes("documents")
+        return docs
+
     def update_document(self, doc_id: str, updates: Dict[str, Any]) -> Optional[Document]:
-        data = self._load()
-        for i, doc in enumerate(data["documents"]):
-            if doc["id"] == doc_id:
-                data["documents"][i].update(updates)
-                self._save(data)
-                return Document(**data["documents"][i])
-        return None
+        rows = self._load_one("documents")
+        i = self._row_index(rows, "documents").get(doc_id)
+        if i is None:
+            return None
+        rows[i].update(updates)
+        self._save_one("documents", rows)
+        # content_sha256 is an indexed field and may appear in updates
+        self._invalidate_indexes("documents")
+        return Document(**rows[i])
+
+    def bulk_update_documents(self, updates_by_id: Dict[str, Dict[str, Any]]) -> None:
+        """Apply per-document update dicts with a single load/save cycle."""
+        if not updates_by_id:
+            return
+        rows = self._load_one("documents")
+        index = self._row_index(rows, "documents")
+        for doc_id, updates in updates_by_id.items():
+            i = index.get(doc_id)
+            if i is not None:
+                rows[i].update(updates)
+        self._save_one("documents", rows)
+        self._invalidate_indexes("documents")
 
     # Matching Rules
     def get_matching_rules(self) -> List[MatchingRule]:
-        data = self._load()
-        return [MatchingRule(**r) for r in data.get("matching_rules", [])]
+        if self._rules_cache is None:
+            self._rules_cache = _RULE_LIST.validate_python(self._load_one("matching_rules"))
+        return self._rules_cache
+
+    def get_matching_rules_raw(self) -> List[Dict[str, Any]]:
+        """Stored rule rows as-is, for response paths that re-encode anyway."""
+        return self._load_one("matching_rules")
 
     def save_matching_rules(self, rules: List[MatchingRule]) -> List[MatchingRule]:
-        data = self._load()
-        data["matching_rules"] = [to_dict(rule) for rule in rules]
-        self._save(data)
+        self._save_one("matching_rules", [to_dict(rule) for rule in rules])
+        self._rules_cache = None
         return rules
 
     # Validation Results
     def get_validation_results(self) -> List[ValidationResult]:
-        data = self._load()
-        return [ValidationResult(**r) for r in data.get("validation_results", [])]
+        return _VALIDATION_LIST.validate_python(self._load_one("validation_results"))
+
+    def get_validation_results_raw(self) -> List[Dict[str, Any]]:
+        """Stored validation rows as-is, for response paths that re-encode anyway."""
+        return self._load_one("validation_results")
 
     def get_validation_result(self, validation_id: str) -> Optional[ValidationResult]:
-        for result in self.get_validation_results():
-            if result.id == validation_id:
-                return result
-        return None
+        rows = self._load_one("validation_results")
+        i = self._row_index(rows, "validation_results").get(validation_id)
+        if i is None:
+            return None
+        return ValidationResult(**rows[i])
+
+    def _count_validation_delta(self, status: str, decision: str, delta: int) -> None:
+        if self._validation_counts is None:
+            return
+        self._validation_counts["status"][status] += delta
+        self._validation_counts["checker_decision"][decision] += delta
+
+    def get_validation_status_counts(self) -> Dict[str, Counter]:
+        """O(1) status/checker-decision totals, maintained across mutations."""
+        if self._validation_counts is None:
+            statuses: Counter = Counter()
+            decisions: Counter = Counter()
+            for result in self._load_one("validation_results"):
+                statuses[result.get("status", "PENDING")] += 1
+                decisions[result.get("checker_decision", "PENDING")] += 1
+            self._validation_counts = {"status": statuses, "checker_decision": decisions}
+        return self._validation_counts
 
     def create_validation_result(self, result: ValidationResult) -> ValidationResult:
-        data = self._load()
-        data["validation_results"].append(to_dict(result))
-        self._save(data)
+        rows = self._load_one("validation_results")
+        rows.append(to_dict(result))
+        self._save_one("validation_results", rows)
+        self._invalidate_indexes("validation_results")
+        self._count_validation_delta(result.status, result.checker_decision, +1)
         return result
 
+    def create_validation_results(self, results: List[ValidationResult]) -> List[ValidationResult]:
+        """Insert many validation results with a single load/save cycle."""
+        if not results:
+            return results
+        rows = self._load_one("validation_results")
+        rows.extend(to_dict(result) for result in results)
+        self._save_one("validation_results", rows)
+        self._invalidate_indexes("validation_results")
+        for result in results:
+            self._count_validation_delta(result.status, result.checker_decision, +1)
+        return results
+
     def update_validation_result(self, validation_id: str, updates: Dict[str, Any]) -> Optional[ValidationResult]:
-        data = self._load()
-        for i, result in enumerate(data["validation_results"]):
-            if result["id"] == validation_id:
-                data["validation_results"][i].update(updates)
-                self._save(data)
-                return ValidationResult(**data["validation_results"][i])
-        return None
+        rows = self._load_one("validation_results")
+        i = self._row_index(rows, "validation_results").get(validation_id)
+        if i is None:
+            return None
+        result = rows[i]
+        old_status = result.get("status", "PENDING")
+        old_decision = result.get("checker_decision", "PENDING")
+        result.update(updates)
+        self._save_one("validation_results", rows)
+        updated = ValidationResult(**result)
+        self._count_validation_delta(old_status, old_decision, -1)
+        self._count_validation_delta(updated.status, updated.checker_decision, +1)
+        return updated
 
     def import_trades(self, trs_trades: List[TRSTradeCreate]):
-        data = self._load()
+        rows = self._load_one("trs_trades")
+
+        # Stage the whole batch, then commit it with one extend + one save
+        # (the executemany shape): no per-row list growth or file rewrite.
+        # One dump per trade; the rows never pass through TRSTrade again.
+        # One timestamp for the whole batch -- rows imported together
+        # share it, and the formatter runs once instead of twice per row
+        now = datetime.now().isoformat()
+        ids = generate_ids(len(trs_trades))
+
+        def staged():
+            for new_id, trade in zip(ids, trs_trades):
+                payload = to_dict(trade)
+                payload["id"] = new_id
+                payload["created_at"] = now
+                payload["updated_at"] = now
+                yield payload
 
-        for trade in trs_trades:
-            new_trade = TRSTrade(
-                id=generate_id(),
-                **to_dict(trade),
-                created_at=datetime.now().isoformat(),
-                updated_at=datetime.now().isoformat(),
-            )
-            data["trs_trades"].append(to_dict(new_trade))
+        rows.extend(staged())
 
-        self._save(data)
+        self._save_one("trs_trades", rows)
+        self._trs_cache = None
+        self._invalidate_indexes("trs_trades")
 
 
 # Global database instance
 db = JSONDatabase(db_path=settings.database_path)
+atexit.register(db.flush)
@@ -1,7 +1,15 @@
+import re
 from datetime import datetime
 from difflib import SequenceMatcher
+from functools import lru_cache
+from operator import attrgetter
 from typing import Any, List, Optional, Union
 
+try:
+    from rapidfuzz import fuzz as rf_fuzz  # type: ignore
+except Exception:  # pragma: no cover - optional dependency in local dev
+    rf_fuzz = None
+
 from app.models import (
     ExtractedTrade,
     FieldComparison,
@@ -11,21 +19,223 @@ from app.models import (
 )
 from app.models.schemas import generate_id
 
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d", "%d-%m-%Y", "%m-%d-%Y")
+
+TRS_FIELDS = (
+    "trade_id",
+    "party_a",
+    "party_b",
+    "trade_date",
+    "effective_date",
+    "scheduled_termination_date",
+    "bond_return_payer",
+    "bond_return_receiver",
+    "local_currency",
+    "notional_amount",
+    "usd_notional_amount",
+    "initial_spot_rate",
+    "current_market_price",
+    "underlier",
+    "isin",
+)
+
+_FIELD_POS = {name: position for position, name in enumerate(TRS_FIELDS)}
+
+# One C-level call fetches all fields of a trade when building score rows
+_TRS_ROW = attrgetter(*TRS_FIELDS)
+
+# Contribution of each match status to a candidate's best-match score
+_STATUS_SCORE = {
+    "MATCH": 1.0,
+    "WITHIN_TOLERANCE": 0.6,
+    "LOW_CONFIDENCE": 0.25,
+    "MISMATCH": 0.0,
+}
+
+# Last format that parsed successfully; documents and trade batches are
+# internally consistent, so trying it first usually skips the format loop.
+_last_date_fmt = [DATE_FORMATS[0]]
+
+
+@lru_cache(maxsize=4096)
+def _fuzzy_ratio(s1: str, s2: str, threshold: float = 0.0) -> float:
+    """Similarity ratio in [0, 1], memoized per normalized string pair.
+
+    During best-match scoring the same extracted value is compared against
+    every candidate trade, and counterparty names repeat across documents,
+    so the hit rate is high. Ratios that provably fall below `threshold`
+    may be reported as 0.0; callers only compare the result against that
+    same threshold, so the short-circuit is safe.
+    """
+    if rf_fuzz is not None:
+        # C implementation; ~10-50x faster than difflib on this path.
+        # score_cutoff lets rapidfuzz bail out of the alignment early.
+        return rf_fuzz.ratio(s1, s2, score_cutoff=threshold * 100.0) / 100.0
+    # autojunk treats frequent characters as junk on longer strings, which
+    # both skews ratios on legal-entity names and costs time computing the
+    # junk set; these are short identifiers, not prose.
+    matcher = SequenceMatcher(None, s1, s2, autojunk=False)
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+@lru_cache(maxsize=4096)
+def _norm_str(value: str) -> str:
+    return value.strip().lower()
+
+
+def _normalize(value: Any) -> str:
+    """Stripped, lowercased string form of a value.
+
+    String normalization is memoized: one extracted value is normalized
+    against every candidate trade during scoring, and system-side values
+    repeat across documents.
+    """
+    if type(value) is str:
+        return _norm_str(value)
+    return str(value).strip().lower()
+
+
+# Plain decimal or scientific notation, the shapes trade amounts come in
+_NUM_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\Z")
+
+
+@lru_cache(maxsize=2048)
+def _float_from_str(value: str) -> Optional[float]:
+    # Shape check instead of try/except: raising and catching ValueError on
+    # every non-numeric string is far more expensive than the regex, and
+    # scoring probes plenty of non-numeric values. Exotic literals float()
+    # would accept (inf/nan/underscores) coerce to None deliberately --
+    # they are never legitimate trade amounts.
+    stripped = value.strip()
+    if _NUM_RE.match(stripped):
+        return float(stripped)
+    return None
+
+
+def _coerce_float(value: Any) -> Optional[float]:
+    """Numeric value as float, or None if it cannot be coerced.
+
+    Floats and ints pass straight through; strings go through a memoized
+    parse because the same extracted amount is re-coerced against every
+    candidate trade during best-match scoring.
+    """
+    kind = type(value)
+    if kind is float:
+        return value
+    if kind is int:
+        return float(value)
+    if kind is str:
+        return _float_from_str(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_str(value: str) -> Optional[datetime]:
+    """Parse a date string against the supported formats, memoized.
+
+    Trades carry the same handful of date strings through repeated
+    comparisons, so caching skips the strptime format loop entirely.
+    """
+    # Non-datelike strings (names, ids, empty values) bail out before
+    # strptime gets a chance to raise: every supported format starts with
+    # a digit and needs at least 8 characters.
+    if len(value) < 8 or not value[0].isdigit():
+        return None
+    # Fast path: system records store ISO YYYY-MM-DD; building the datetime
+    # from slices skips strptime's format-string interpreter entirely.
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        try:
+            return datetime(int(value[:4]), int(value[5:7]), int(value[8:10]))
+        except ValueError:
+            pass
+    last = _last_date_fmt[0]
+    try:
+        return datetime.strptime(value, last)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        if fmt == last:
+            continue
+        try:
+            parsed = datetime.strptime(value, fmt)
+            _last_date_fmt[0] = fmt
+            return parsed
+        except ValueError:
+            continue
+    return None
+
 
 class ComparisonEngine:
     """Engine for comparing extracted TRS data with system records."""
 
     def __init__(self, rules: Optional[List[MatchingRule]] = None):
-        self.rules = rules or []
+        self._indexed_trades: Optional[List[TRSTrade]] = None
+        self._trade_id_positions: dict = {}
+        self._trade_rows: List[tuple] = []
+        self.set_rules(rules or [])
 
     def set_rules(self, rules: List[MatchingRule]):
         self.rules = rules
+        # Rules change rarely and are read on every field comparison, so
+        # index them here. setdefault keeps the first enabled rule per
+        # field, matching the old linear scan.
+        index: dict = {}
+        for rule in rules:
+            if rule.enabled:
+                index.setdefault(rule.field_name, rule)
+        self._rule_index = index
+        self._comparators = {
+            field_name: self._compile_rule(rule) for field_name, rule in index.items()
+        }
 
     def get_rule(self, field_name: str) -> Optional[MatchingRule]:
-        for rule in self.rules:
-            if rule.field_name == field_name and rule.enabled:
-                return rule
-        return None
+        return self._rule_index.get(field_name)
+
+    def _compile_rule(self, rule: MatchingRule):
+        """Specialize a rule into a (value, value, confidence) -> status callable.
+
+        Binding the rule type, tolerance and confidence floor into a closure
+        at set_rules time removes the dispatch branching and rule attribute
+        reads from every comparison in the hot path.
+        """
+        rule_type = rule.rule_type
+        if rule_type == "exact":
+            base = self._exact_match
+        elif rule_type == "tolerance":
+            tolerance = rule.tolerance_value or 0
+            unit = rule.tolerance_unit or "absolute"
+
+            def base(val1, val2, _match=self._tolerance_match, _tol=tolerance, _unit=unit):
+                return _match(val1, val2, _tol, _unit)
+
+        elif rule_type == "fuzzy":
+            base = self._fuzzy_match
+        elif rule_type == "date_tolerance":
+            tolerance_days = int(rule.tolerance_value or 0)
+
+            def base(val1, val2, _match=self._date_tolerance_match, _days=tolerance_days):
+                return _match(val1, val2, _days)
+
+        else:
+
+            def base(val1, val2):
+                return "MATCH" if val1 == val2 else "MISMATCH"
+
+        min_confidence = rule.min_confidence
+        if not min_confidence:
+            return lambda val1, val2, confidence, _base=base: _base(val1, val2)
+
+        def comparator(val1, val2, confidence, _base=base, _floor=min_confidence):
+            if confidence < _floor:
+                return "LOW_CONFIDENCE"
+            return _base(val1, val2)
+
+        return comparator
 
     def compare_values(
         self,
@@ -36,63 +246,48 @@ class ComparisonEngine:
     ) -> FieldComparison:
         rule = self.get_rule(field_name)
         min_confidence = rule.min_confidence if rule else 0.0
+        match_status = self._match_status(field_name, extracted_value, system_value, confidence)
 
-        if confidence < min_confidence:
-            return FieldComparison(
-                field_name=field_name,
-                extracted_value=extracted_value,
-                system_value=system_value,
-                match_status="LOW_CONFIDENCE",
-                confidence=confidence,
-                min_required_confidence=min_confidence,
-                rule_applied=f"min_confidence_{min_confidence}",
-            )
-
-        if rule is None:
-            match_status = "MATCH" if str(extracted_value).strip().lower() == str(system_value).strip().lower() else "MISMATCH"
-            return FieldComparison(
-                field_name=field_name,
-                extracted_value=extracted_value,
-                system_value=system_value,
-                match_status=match_status,
-                confidence=confidence,
-                min_required_confidence=min_confidence,
-                rule_applied="default_exact",
-            )
-
-        if rule.rule_type == "exact":
-            match_status = self._exact_match(extracted_value, system_value)
-        elif rule.rule_type == "tolerance":
-            match_status = self._tolerance_match(
-                extracted_value,
-                system_value,
-                rule.tolerance_value or 0,
-                rule.tolerance_unit or "absolute",
-            )
-        elif rule.rule_type == "fuzzy":
-            match_status = self._fuzzy_match(extracted_value, system_value)
-        elif rule.rule_type == "date_tolerance":
-            match_status = self._date_tolerance_match(
-                extracted_value,
-                system_value,
-                int(rule.tolerance_value or 0),
-            )
+        if match_status == "LOW_CONFIDENCE":
+            rule_applied = f"min_confidence_{min_confidence}"
+        elif rule is None:
+            rule_applied = "default_exact"
         else:
-            match_status = "MATCH" if extracted_value == system_value else "MISMATCH"
+            rule_applied = f"{rule.rule_type}_{rule.tolerance_value or ''}{rule.tolerance_unit or ''}"
 
-        return FieldComparison(
+        # Values are produced in-process; model_construct skips re-validation
+        return FieldComparison.model_construct(
             field_name=field_name,
             extracted_value=extracted_value,
             system_value=system_value,
             match_status=match_status,
             confidence=confidence,
             min_required_confidence=min_confidence,
-            rule_applied=f"{rule.rule_type}_{rule.tolerance_value or ''}{rule.tolerance_unit or ''}",
+            rule_applied=rule_applied,
         )
 
+    def _match_status(
+        self,
+        field_name: str,
+        extracted_value: Any,
+        system_value: Any,
+        confidence: float,
+    ) -> str:
+        """Match status for one field without building a FieldComparison.
+
+        The score-only pass in find_best_match calls this directly so losing
+        candidates never pay for model construction. Ruled fields go through
+        their precompiled comparator; unruled fields default to normalized
+        equality.
+        """
+        comparator = self._comparators.get(field_name)
+        if comparator is None:
+            return "MATCH" if _normalize(extracted_value) == _normalize(system_value) else "MISMATCH"
+        return comparator(extracted_value, system_value, confidence)
+
     def _exact_match(self, val1: Any, val2: Any) -> str:
         if isinstance(val1, str) and isinstance(val2, str):
-            return "MATCH" if val1.strip().lower() == val2.strip().lower() else "MISMATCH"
+            return "MATCH" if _norm_str(val1) == _norm_str(val2) else "MISMATCH"
         return "MATCH" if val1 == val2 else "MISMATCH"
 
     def _tolerance_match(
@@ -102,10 +297,9 @@ class ComparisonEngine:
         tolerance: float,
         unit: str,
     ) -> str:
-        try:
-            v1 = float(val1)
-            v2 = float(val2)
-        except (TypeError, ValueError):
+        v1 = _coerce_float(val1)
+        v2 = _coerce_float(val2)
+        if v1 is None or v2 is None:
             return "MISMATCH"
 
         if unit == "percent":
@@ -123,12 +317,19 @@ class ComparisonEngine:
 
     def _fuzzy_match(self, val1: str, val2: str, threshold: float = 0.8) -> str:
         try:
-            s1 = str(val1).lower().strip()
-            s2 = str(val2).lower().strip()
+            s1 = _normalize(val1)
+            s2 = _normalize(val2)
             if s1 == s2:
                 return "MATCH"
 
-            ratio = SequenceMatcher(None, s1, s2).ratio()
+            # Length gate: the ratio can never exceed 2*min/(len1+len2),
+            # so wildly different lengths skip the alignment entirely.
+            len1, len2 = len(s1), len(s2)
+            total = len1 + len2
+            if not total or 2.0 * min(len1, len2) / total < threshold:
+                return "MISMATCH"
+
+            ratio = _fuzzy_ratio(s1, s2, threshold)
             if ratio >= 0.95:
                 return "MATCH"
             if ratio >= threshold:
@@ -150,39 +351,25 @@ class ComparisonEngine:
         return "WITHIN_TOLERANCE" if diff_days <= tolerance_days else "MISMATCH"
 
     def _parse_date(self, value: Any) -> Optional[datetime]:
-        for fmt in ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d", "%d-%m-%Y", "%m-%d-%Y"]:
-            try:
-                return datetime.strptime(str(value), fmt)
-            except ValueError:
-                continue
-        return None
-
-    def compare_trs_trade(self, extracted: ExtractedTrade, system_trade: TRSTrade, document_id: str) -> ValidationResult:
-        field_comparisons: List[FieldComparison] = []
-
-        trs_fields = [
-            "trade_id",
-            "party_a",
-            "party_b",
-            "trade_date",
-            "effective_date",
-            "scheduled_termination_date",
-            "bond_return_payer",
-            "bond_return_receiver",
-            "local_currency",
-            "notional_amount",
-            "usd_notional_amount",
-            "initial_spot_rate",
-            "current_market_price",
-            "underlier",
-            "isin",
+        return _parse_date_str(str(value))
+
+    def _prepare_extracted(self, extracted: ExtractedTrade) -> List[tuple]:
+        """Flatten the extracted fields into (name, value, confidence) tuples.
+
+        The dict lookups and attribute fetches only depend on the document,
+        so best-match scoring prepares them once instead of once per
+        candidate trade.
+        """
+        fields = extracted.fields
+        return [
+            (_FIELD_POS[name], name, field.value, field.confidence)
+            for name in TRS_FIELDS
+            if (field := fields.get(name)) is not None
         ]
 
-        for field_name in trs_fields:
-            extracted_field = extracted.fields.get(field_name)
-            if extracted_field is None:
-                continue
-
+    def _compare_prepared(self, prepared: List[tuple], system_trade: TRSTrade) -> List[FieldComparison]:
+        field_comparisons: List[FieldComparison] = []
+        for _, field_name, value, confidence in prepared:
             system_value = getattr(system_trade, field_name, None)
             if system_value is None:
                 continue
@@ -190,12 +377,26 @@ class ComparisonEngine:
             field_comparisons.append(
                 self.compare_values(
                     field_name=field_name,
-                    extracted_value=extracted_field.value,
+                    extracted_value=value,
                     system_value=system_value,
-                    confidence=extracted_field.confidence,
+                    confidence=confidence,
                 )
             )
+        return field_comparisons
 
+    def compare_trs_trade(self, extracted: ExtractedTrade, system_trade: TRSTrade, document_id: str) -> ValidationResult:
+        return self._build_result(
+            self._compare_prepared(self._prepare_extracted(extracted), system_trade),
+            system_trade,
+            document_id,
+        )
+
+    def _build_result(
+        self,
+        field_comparisons: List[FieldComparison],
+        system_trade: TRSTrade,
+        document_id: str,
+    ) -> ValidationResult:
         status = self._determine_overall_status(field_comparisons)
 
         return ValidationResult(
@@ -239,10 +440,17 @@ class ComparisonEngine:
         if not comparisons:
             return "PENDING"
 
-        match_count = sum(1 for c in comparisons if c.match_status == "MATCH")
-        tolerance_count = sum(1 for c in comparisons if c.match_status == "WITHIN_TOLERANCE")
-        low_conf_count = sum(1 for c in comparisons if c.match_status == "LOW_CONFIDENCE")
-        mismatch_count = sum(1 for c in comparisons if c.match_status == "MISMATCH")
+        match_count = tolerance_count = low_conf_count = mismatch_count = 0
+        for comparison in comparisons:
+            status = comparison.match_status
+            if status == "MATCH":
+                match_count += 1
+            elif status == "WITHIN_TOLERANCE":
+                tolerance_count += 1
+            elif status == "LOW_CONFIDENCE":
+                low_conf_count += 1
+            elif status == "MISMATCH":
+                mismatch_count += 1
 
         if mismatch_count == 0 and tolerance_count == 0 and low_conf_count == 0:
             return "MATCH"
@@ -266,34 +474,85 @@ class ComparisonEngine:
 
         extracted_trade_id = extracted.fields.get("trade_id")
         if extracted_trade_id and extracted_trade_id.value:
-            for trade in trs_trades:
-                if trade.trade_id.lower() == str(extracted_trade_id.value).strip().lower():
-                    return self.compare_trs_trade(extracted, trade, document_id)
+            wanted = str(extracted_trade_id.value).strip().lower()
+            position = self._trade_id_index(trs_trades).get(wanted)
+            if position is not None:
+                return self.compare_trs_trade(extracted, trs_trades[position], document_id)
 
-        best_result: Optional[ValidationResult] = None
+        prepared = self._prepare_extracted(extracted)
+        best_trade: Optional[TRSTrade] = None
         best_score = -1.0
 
-        for trade in trs_trades:
-            result = self.compare_trs_trade(extracted, trade, document_id)
-            score = sum(
-                1.0
-                if c.match_status == "MATCH"
-                else 0.6
-                if c.match_status == "WITHIN_TOLERANCE"
-                else 0.25
-                if c.match_status == "LOW_CONFIDENCE"
-                else 0.0
-                for c in result.field_comparisons
-            )
-
+        for position, row in enumerate(self._trade_rows_for(trs_trades)):
+            score = self._score_prepared(prepared, row, best_score)
             if score > best_score:
                 best_score = score
-                best_result = result
+                best_trade = trs_trades[position]
 
-        if best_result and not best_result.field_comparisons:
+        if best_trade is None:
             return None
 
-        return best_result
+        comparisons = self._compare_prepared(prepared, best_trade)
+        if not comparisons:
+            return None
+
+        return self._build_result(comparisons, best_trade, document_id)
+
+    def _score_prepared(self, prepared: List[tuple], row: tuple, best_score: float) -> float:
+        """Score one candidate row, abandoning early once it cannot win.
+
+        Each remaining field contributes at most 1.0, so as soon as the
+        running score plus that bound cannot beat the current best the rest
+        of the (fuzzy/date) comparisons are skipped.
+        """
+        score = 0.0
+        remaining = len(prepared)
+        for position, field_name, value, confidence in prepared:
+            remaining -= 1
+            system_value = row[position]
+            if system_value is None:
+                continue
+
+            status = self._match_status(field_name, value, system_value, confidence)
+            score += _STATUS_SCORE[status]
+
+            if score + remaining <= best_score:
+                return score
+
+        return score
+
+    def _trade_id_index(self, trs_trades: List[TRSTrade]) -> dict:
+        """Lowercased trade_id -> position, cached per trade-list object.
+
+        The database hands out the same validated list until trades change,
+        so bulk validation reuses one index instead of scanning every trade
+        per document. Holding a reference to the keyed list keeps the
+        identity check sound.
+        """
+        self._ensure_trade_batch(trs_trades)
+        return self._trade_id_positions
+
+    def _trade_rows_for(self, trs_trades: List[TRSTrade]) -> List[tuple]:
+        """Field values per trade as plain tuples aligned with TRS_FIELDS.
+
+        Scoring touches every field of every candidate; reading from flat
+        tuples replaces repeated pydantic attribute lookups and keeps the
+        batch in one compact structure, rebuilt only when the trade list
+        changes.
+        """
+        self._ensure_trade_batch(trs_trades)
+        return self._trade_rows
+
+    def _ensure_trade_batch(self, trs_trades: List[TRSTrade]) -> None:
+        if trs_trades is not self._indexed_trades:
+            self._indexed_trades = trs_trades
+            # setdefault keeps the first occurrence of a duplicated trade_id,
+            # matching the linear scan this index replaced
+            positions: dict = {}
+            for position, trade in enumerate(trs_trades):
+                positions.setdefault(trade.trade_id.lower(), position)
+            self._trade_id_positions = positions
+            self._trade_rows = [_TRS_ROW(trade) for trade in trs_trades]
 
     def _average_comparison_confidence(self, comparisons: List[FieldComparison]) -> Optional[float]:
         if not comparisons:
@@ -4,7 +4,9 @@ import hashlib
 import logging
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
@@ -26,9 +28,136 @@ try:
 except Exception:  # pragma: no cover - optional dependency in local dev
     DocxFile = None
 
+try:
+    import pypdfium2 as pdfium  # type: ignore
+except Exception:  # pragma: no cover - optional dependency in local dev
+    pdfium = None
+
+try:
+    from selectolax.parser import HTMLParser  # type: ignore
+except Exception:  # pragma: no cover - optional dependency in local dev
+    HTMLParser = None
+
 
 SUPPORTED_ATTACHMENT_EXTENSIONS = {".pdf", ".docx", ".png", ".jpg", ".jpeg", ".gif", ".bmp"}
 
+# Compiled once at import; these run on every email body and attachment name
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_UNSAFE_CHARS_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+@lru_cache(maxsize=256)
+def _cached_pdf_text(file_path: str, mtime_ns: int, size: int) -> str:
+    """pypdf text extraction memoized per file version.
+
+    Repeat extract/validate cycles over the same document are common in this
+    workflow; keying on (path, mtime, size) makes re-parsing a dict lookup
+    while staying correct when the file changes on disk.
+    """
+    # PDFium's native text path is several times faster than pypdf; fall
+    # back to pypdf for files PDFium rejects or when it isn't installed
+    if pdfium is not None:
+        try:
+            text = _pdfium_pdf_text(file_path)
+            if text:
+                return text
+        except Exception as exc:
+            logger.warning("pypdfium2 extraction failed for %s, falling back to pypdf: %s", file_path, exc)
+
+    return _pypdf_pdf_text(file_path)
+
+
+@lru_cache(maxsize=256)
+def _cached_pdf_page_count(file_path: str, mtime_ns: int, size: int) -> int:
+    """Page count memoized per file version, for the OCR fallback.
+
+    The OCR path only needs the count, so a full PdfReader parse (xref,
+    trailer, page tree) per call was wasted work -- the same file was
+    usually just parsed for text moments earlier. PDFium reads the count
+    from the header cheaply when available.
+    """
+    if pdfium is not None:
+        try:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        except Exception as exc:
+            logger.warning("pypdfium2 page count failed for %s, falling back to pypdf: %s", file_path, exc)
+
+    return len(PdfReader(file_path).pages)
+
+
+def _pdfium_pdf_text(file_path: str) -> str:
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        text_parts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            text_parts.append(textpage.get_text_range().strip())
+            textpage.close()
+            page.close()
+        return "\n".join(part for part in text_parts if part)
+    finally:
+        pdf.close()
+
+
+def _pypdf_page_text(file_path: str, page_index: int) -> str:
+    # Each worker opens its own reader: pypdf pages lazily seek and read
+    # their reader's single underlying stream, so sharing one PdfReader
+    # across threads garbles or breaks extraction
+    reader = PdfReader(file_path)
+    return (reader.pages[page_index].extract_text() or "").strip()
+
+
+def _pypdf_pdf_text(file_path: str) -> str:
+    try:
+        page_count = len(PdfReader(file_path).pages)
+        if not page_count:
+            return ""
+
+        if page_count == 1:
+            text_parts = [_pypdf_page_text(file_path, 0)]
+        else:
+            # Page extraction is independent; a small pool cuts wall time
+            # roughly to pages / workers on multi-page documents
+            with ThreadPoolExecutor(max_workers=min(8, page_count)) as executor:
+                text_parts = list(
+                    executor.map(_pypdf_page_text, [file_path] * page_count, range(page_count))
+                )
+
+        return "\n".join(part for part in text_parts if part)
+    except Exception as exc:
+        logger.warning("PDF text extraction failed for %s: %s", file_path, exc)
+        return ""
+
+
+@lru_cache(maxsize=128)
+def _cached_docx_text(file_path: str, mtime_ns: int, size: int) -> str:
+    """python-docx paragraph and table text memoized per file version.
+
+    The same DOCX termsheet gets re-read across extract/validate retries
+    and when referenced out of an MSG; unpacking and parsing the package
+    is the expensive part, so repeats become a dict lookup, keyed the same
+    way as the PDF text cache.
+    """
+    doc = DocxFile(file_path)
+    text_parts: List[str] = []
+    for paragraph in doc.paragraphs:
+        text = paragraph.text.strip()
+        if text:
+            text_parts.append(text)
+
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
+            if row_text:
+                text_parts.append(row_text)
+
+    return "\n".join(text_parts)
+
 
 @dataclass
 class NormalizedEvidence:
@@ -52,9 +181,15 @@ class EvidenceProcessor:
     - msg (Outlook email with supported attachments)
     """
 
-    def __init__(self, min_pdf_text_length: int = 80, max_pdf_ocr_pages: int = 3):
+    def __init__(
+        self,
+        min_pdf_text_length: int = 80,
+        max_pdf_ocr_pages: int = 3,
+        max_ocr_workers: int = 4,
+    ):
         self.min_pdf_text_length = min_pdf_text_length
         self.max_pdf_ocr_pages = max_pdf_ocr_pages
+        self.max_ocr_workers = max_ocr_workers
 
     def prepare_document_content(self, doc: Document) -> NormalizedEvidence:
         if doc.file_type == "text":
@@ -92,7 +227,7 @@ class EvidenceProcessor:
 
         subject = (message.subject or "").strip()
         sender = (message.sender or "").strip()
-        body = self._clean_text((message.body or "").strip())
+        body = self._clean_text(message.body or "")
 
         attachment_text_parts: List[str] = []
         attachment_metadata: List[Dict[str, Any]] = []
@@ -103,6 +238,7 @@ class EvidenceProcessor:
         os.makedirs(attachment_dir, exist_ok=True)
 
         seen_hashes: Set[str] = set()
+        pending: List[Tuple[str, str]] = []  # (saved path, display filename)
 
         for index, attachment in enumerate(message.attachments):
             filename = self._safe_attachment_name(
@@ -130,13 +266,38 @@ class EvidenceProcessor:
             attachment_path = os.path.join(attachment_dir, f"{index}_{filename}")
 
             try:
-                with open(attachment_path, "wb") as output_file:
-                    output_file.write(attachment.data)
+                # attachment.data is already a fully materialized bytes
+                # object, so write it with one direct syscall instead of
+                # pushing multi-MB payloads through BufferedWriter's copy
+                fd = os.open(attachment_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    # POSIX allows short writes; loop until the payload is out
+                    view = memoryview(attachment.data)
+                    while view:
+                        view = view[os.write(fd, view):]
+                finally:
+                    os.close(fd)
             except Exception as exc:
                 warnings.append(f"Failed to save attachment {filename}: {exc}")
                 continue
 
-            extracted_text, item_meta = self._extract_attachment_text(attachment_path)
+            pending.append((attachment_path, filename))
+
+        # Extraction fans out over a bounded pool: each attachment may run
+        # its own PDF parse or OCR pass, all independent of one another.
+        # Results come back via map in submission order, so the assembly
+        # below (including first-DOCX-wins) behaves exactly like the old
+        # sequential loop.
+        if len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+                extractions = list(
+                    executor.map(lambda item: self._extract_attachment_text(item[0]), pending)
+                )
+        else:
+            extractions = [self._extract_attachment_text(path) for path, _ in pending]
+
+        for (attachment_path, filename), (extracted_text, item_meta) in zip(pending, extractions):
+            extracted_text = extracted_text.strip()
             item_meta["attachment_name"] = filename
             attachment_metadata.append(item_meta)
 
@@ -151,13 +312,13 @@ class EvidenceProcessor:
                         "  Skipping OCR text for image %s (will be sent as base64 to LLM)",
                         filename,
                     )
-                elif extracted_text.strip():
+                elif extracted_text:
                     # Images NOT sent visually — include OCR text so the LLM has this content
-                    attachment_text_parts.append(f"[Attachment: {filename} (OCR)]\n{extracted_text.strip()}")
+                    attachment_text_parts.append(f"[Attachment: {filename} (OCR)]\n{extracted_text}")
                     logger.info(
                         "  Including OCR text for image %s (%d chars)",
                         filename,
-                        len(extracted_text.strip()),
+                        len(extracted_text),
                     )
             elif is_docx and docx_included:
                 # Only use the first DOCX termsheet; skip duplicates
@@ -166,8 +327,8 @@ class EvidenceProcessor:
                     "  Skipping additional DOCX %s (first DOCX already included)",
                     filename,
                 )
-            elif extracted_text.strip():
-                attachment_text_parts.append(f"[Attachment: {filename}]\n{extracted_text.strip()}")
+            elif extracted_text:
+                attachment_text_parts.append(f"[Attachment: {filename}]\n{extracted_text}")
                 if is_docx:
                     docx_included = True
 
@@ -185,7 +346,7 @@ class EvidenceProcessor:
         combined_parts.extend(attachment_text_parts)
         combined_content = "\n\n".join(part for part in combined_parts if part)
 
-        if not combined_content.strip():
+        if not combined_content:
             combined_content = "[MSG evidence: no extractable content]"
 
         # Log content extraction summary
@@ -287,13 +448,16 @@ class EvidenceProcessor:
     def _prepare_pdf_evidence(self, file_path: str) -> NormalizedEvidence:
         warnings: List[str] = []
         extracted_text = self._extract_pdf_text(file_path)
-        needs_ocr = len(extracted_text.strip()) < self.min_pdf_text_length
+        # Extraction joins stripped, non-empty page texts, so the result
+        # carries no surrounding whitespace -- len() alone decides the OCR
+        # gate without copying a potentially multi-MB string via strip()
+        needs_ocr = len(extracted_text) < self.min_pdf_text_length
 
         ocr_text = ""
         ocr_pages = 0
         if needs_ocr:
             ocr_text, ocr_pages = self._extract_pdf_ocr_text(file_path)
-            if not ocr_text.strip():
+            if not ocr_text:
                 warnings.append("PDF OCR fallback produced no text")
 
         content = self._combine_text(extracted_text, ocr_text)
@@ -320,23 +484,14 @@ class EvidenceProcessor:
         if DocxFile is None:
             raise ValueError("DOCX processing requires 'python-docx'. Add python-docx to backend dependencies.")
 
-        text_parts: List[str] = []
+        content = ""
         try:
-            doc = DocxFile(file_path)
-            for paragraph in doc.paragraphs:
-                text = paragraph.text.strip()
-                if text:
-                    text_parts.append(text)
-
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
-                    if row_text:
-                        text_parts.append(row_text)
+            stat = os.stat(file_path)
+            content = _cached_docx_text(file_path, stat.st_mtime_ns, stat.st_size)
         except Exception as exc:
             warnings.append(f"DOCX extraction failed: {exc}")
 
-        content = "\n".join(text_parts).strip() or "[DOCX evidence: no extractable text]"
+        content = content or "[DOCX evidence: no extractable text]"
         return NormalizedEvidence(
             content=content,
             image_path=None,
@@ -346,52 +501,66 @@ class EvidenceProcessor:
 
     def _extract_pdf_text(self, file_path: str) -> str:
         try:
-            reader = PdfReader(file_path)
-            text_parts = [(page.extract_text() or "").strip() for page in reader.pages]
-            return "\n".join(part for part in text_parts if part)
-        except Exception as exc:
-            print(f"PDF text extraction failed for {file_path}: {exc}")
+            stat = os.stat(file_path)
+        except OSError as exc:
+            logger.warning("PDF text extraction failed for %s: %s", file_path, exc)
             return ""
+        return _cached_pdf_text(file_path, stat.st_mtime_ns, stat.st_size)
 
     def _extract_pdf_ocr_text(self, file_path: str) -> Tuple[str, int]:
         try:
-            reader = PdfReader(file_path)
-            page_count = len(reader.pages)
+            stat = os.stat(file_path)
+            page_count = _cached_pdf_page_count(file_path, stat.st_mtime_ns, stat.st_size)
         except Exception as exc:
-            print(f"Could not determine PDF page count for OCR: {exc}")
+            logger.warning("Could not determine PDF page count for OCR: %s", exc)
             return "", 0
 
         max_pages = min(page_count, self.max_pdf_ocr_pages)
         text_parts: List[str] = []
 
-        for page_num in range(max_pages):
-            try:
-                ocr_result = vision_ocr.process_document(file_path, page_num=page_num, include_image=False)
-                if ocr_result.full_text.strip():
-                    text_parts.append(ocr_result.full_text.strip())
-            except Exception as exc:
-                print(f"PDF OCR failed for page {page_num} in {file_path}: {exc}")
+        # Page OCR is independent native work (PyMuPDF render + Vision),
+        # so pages run concurrently; iterating futures in submission order
+        # keeps the output in page order. include_image=False bounds the
+        # memory held per in-flight page.
+        with ThreadPoolExecutor(max_workers=min(self.max_ocr_workers, max(max_pages, 1))) as executor:
+            futures = [
+                executor.submit(vision_ocr.process_document, file_path, page_num=page_num, include_image=False)
+                for page_num in range(max_pages)
+            ]
+            for page_num, future in enumerate(futures):
+                try:
+                    page_text = future.result().full_text.strip()
+                    if page_text:
+                        text_parts.append(page_text)
+                except Exception as exc:
+                    logger.warning("PDF OCR failed for page %s in %s: %s", page_num, file_path, exc)
 
         return "\n".join(text_parts), max_pages
 
     def _combine_text(self, pdf_text: str, ocr_text: str) -> str:
-        pdf_clean = pdf_text.strip()
-        ocr_clean = ocr_text.strip()
-
-        if pdf_clean and ocr_clean:
-            return f"{pdf_clean}\n\n[OCR FALLBACK]\n{ocr_clean}"
-        return pdf_clean or ocr_clean
+        # Both inputs are joins of stripped page texts, so no re-strip here
+        if pdf_text and ocr_text:
+            return f"{pdf_text}\n\n[OCR FALLBACK]\n{ocr_text}"
+        return pdf_text or ocr_text
 
     def _clean_text(self, content: str) -> str:
         # If we receive HTML body text, strip tags as best-effort fallback.
         if "<" in content and ">" in content:
-            no_tags = re.sub(r"<[^>]+>", " ", content)
-            return re.sub(r"\s+", " ", no_tags).strip()
-        return content
+            if HTMLParser is not None:
+                # Lexer-based C parser: much faster than the regex pass on
+                # multi-KB HTML bodies and decodes entities like &nbsp;
+                try:
+                    no_tags = HTMLParser(content).text(separator=" ")
+                    return _WS_RE.sub(" ", no_tags).strip()
+                except Exception as exc:
+                    logger.warning("selectolax HTML stripping failed, using regex fallback: %s", exc)
+            no_tags = _HTML_TAG_RE.sub(" ", content)
+            return _WS_RE.sub(" ", no_tags).strip()
+        return content.strip()
 
     def _safe_attachment_name(self, name: str) -> str:
         safe = Path(name).name
-        safe = re.sub(r"[^A-Za-z0-9._-]", "_", safe)
+        safe = _UNSAFE_CHARS_RE.sub("_", safe)
         return safe or "attachment.bin"
 
 
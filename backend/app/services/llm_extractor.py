@@ -1,20 +1,60 @@
+import asyncio
 import base64
 import json
 import logging
+import mmap
 import os
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
 
 import httpx
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.config import settings
 from app.models import ExtractedField, ExtractedTrade
 
 logger = logging.getLogger(__name__)
 
+# Mock-extraction patterns, compiled once at import. The per-call re.*
+# functions go through re's bounded internal cache (a dict lookup plus an
+# eviction risk) on every line of every document.
+_NUMBER_RE = re.compile(r"([-+]?\d[\d,]*\.?\d*)")
+_CCY_CODE_RE = re.compile(r"\b([A-Z]{3})\b")
+_KNOWN_CCY_RE = re.compile(r"\b(USD|EUR|GBP|JPY|CHF|AUD|CAD|INR|SGD|HKD)\b")
+_DATE_RES = (
+    re.compile(r"(\d{4}-\d{2}-\d{2})"),
+    re.compile(r"(\d{2}/\d{2}/\d{4})"),
+    re.compile(r"(\d{2}-\d{2}-\d{4})"),
+)
+
+
+@lru_cache(maxsize=128)
+def _label_value_re(label: str) -> re.Pattern:
+    """Compiled 'label: value' matcher; labels come from a fixed literal set."""
+    return re.compile(rf"\b{label}\b\s*[:\-]\s*(.+)$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=128)
+def _label_re(label: str) -> re.Pattern:
+    return re.compile(rf"\b{label}\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _encoded_image(image_path: str, mtime_ns: int) -> str:
+    """Base64 of an image file, memoized per file version.
+
+    The same attachment image is encoded for every extraction attempt on
+    its document; the mtime key keeps the cache honest if the file is
+    rewritten. b64encode reads straight from the mmap'd pages, skipping
+    the intermediate bytes copy a plain read() would allocate.
+    """
+    with open(image_path, "rb") as image_file:
+        with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return base64.b64encode(mapped).decode("ascii")
+
 
 class LLMExtractor:
     def __init__(self):
@@ -23,11 +63,11 @@ class LLMExtractor:
 
         # Central / remote LLM client
         if settings.openai_api_key:
-            http_client = httpx.Client(
+            http_client = httpx.AsyncClient(
                 verify=settings.verify_ssl,
                 timeout=settings.llm_timeout,
             )
-            self.client = OpenAI(
+            self.client = AsyncOpenAI(
                 api_key=settings.openai_api_key,
                 base_url=settings.openai_base_url if settings.openai_base_url else None,
                 http_client=http_client,
@@ -44,11 +84,11 @@ class LLMExtractor:
 
         # Local on-device LLM client (e.g. Qwen3-8B-MLX via AI Inference Engine)
         if settings.local_llm_enabled:
-            local_http_client = httpx.Client(
+            local_http_client = httpx.AsyncClient(
                 verify=False,
                 timeout=settings.local_llm_timeout,
             )
-            self.local_client = OpenAI(
+            self.local_client = AsyncOpenAI(
                 api_key="local",  # local engines typically don't need a real key
                 base_url=settings.local_llm_base_url,
                 http_client=local_http_client,
@@ -61,6 +101,10 @@ class LLMExtractor:
             )
 
         self.schema = self._load_schema()
+        # Caps in-flight LLM requests across coroutines; gather-style batch
+        # callers fan out up to this limit instead of hitting the API
+        # unbounded or one request at a time
+        self._inflight_sem = asyncio.Semaphore(settings.llm_max_concurrent_requests)
 
     def _load_schema(self) -> Dict[str, Any]:
         configured_path = Path(settings.trs_schema_path)
@@ -81,8 +125,10 @@ class LLMExtractor:
         )
 
     def _encode_image(self, image_path: str) -> str:
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
+        stat = os.stat(image_path)
+        if stat.st_size == 0:
+            return ""
+        return _encoded_image(image_path, stat.st_mtime_ns)
 
     def _get_image_media_type(self, image_path: str) -> str:
         ext = os.path.splitext(image_path)[1].lower()
@@ -227,7 +273,7 @@ class LLMExtractor:
             return obj.get(attr, default)
         return getattr(obj, attr, default)
 
-    def _collect_stream_text(self, stream: Any) -> str:
+    async def _collect_stream_text(self, stream: Any) -> str:
         """Collect text from a streaming response, matching the SSI extraction pattern.
 
         Handles both string and list content formats from different LLM providers.
@@ -235,7 +281,7 @@ class LLMExtractor:
         parts: List[str] = []
         events = 0
 
-        for chunk in stream:
+        async for chunk in stream:
             events += 1
             choices = self._safe_get(chunk, "choices", []) or []
             if not choices:
@@ -263,13 +309,14 @@ class LLMExtractor:
         logger.info("  Stream collected: %d events, %d chars", events, len(text))
         return text
 
-    def _send_request(self, body: Dict[str, Any], fallback_label: str = "") -> str:
+    async def _send_request(self, body: Dict[str, Any], fallback_label: str = "") -> str:
         """Send request with streaming/non-streaming support."""
         is_stream = body.pop("stream", False)
 
         if is_stream:
-            result = self.client.chat.completions.create(**body, stream=True)
-            text = self._collect_stream_text(result)
+            async with self._inflight_sem:
+                result = await self.client.chat.completions.create(**body, stream=True)
+                text = await self._collect_stream_text(result)
             logger.info("  %sStreaming response: %d chars", fallback_label, len(text))
             if text:
                 logger.debug("  %sRaw response (first 500): %s", fallback_label, text[:500])
@@ -277,7 +324,8 @@ class LLMExtractor:
                 logger.warning("  %sStreaming returned EMPTY response", fallback_label)
             return text
 
-        response = self.client.chat.completions.create(**body)
+        async with self._inflight_sem:
+            response = await self.client.chat.completions.create(**body)
         text = response.choices[0].message.content or ""
         if hasattr(response, "usage") and response.usage:
             logger.info(
@@ -292,7 +340,7 @@ class LLMExtractor:
             logger.debug("  %sRaw response (first 500): %s", fallback_label, text[:500])
         return text
 
-    def _call_local_llm(
+    async def _call_local_llm(
         self,
         system_prompt: str,
         user_content: Any,
@@ -329,7 +377,8 @@ class LLMExtractor:
 
         start_time = time.time()
 
-        stream = self.local_client.chat.completions.create(
+        async with self._inflight_sem:
+            stream = await self.local_client.chat.completions.create(
             model=settings.local_llm_model,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -346,7 +395,7 @@ class LLMExtractor:
         chars_since_update = 0
         PROGRESS_INTERVAL = 500  # UI update every N chars
 
-        for chunk in stream:
+        async for chunk in stream:
             choices = self._safe_get(chunk, "choices", []) or []
             if not choices:
                 continue
@@ -405,7 +454,7 @@ class LLMExtractor:
 
         return text
 
-    def _call_llm(
+    async def _call_llm(
         self,
         system_prompt: str,
         user_content: Any,
@@ -415,13 +464,13 @@ class LLMExtractor:
 
         # Use local on-device LLM if enabled
         if settings.local_llm_enabled and self.local_client:
-            return self._call_local_llm(system_prompt, user_content, on_progress=on_progress)
+            return await self._call_local_llm(system_prompt, user_content, on_progress=on_progress)
 
         # Central LLM with automatic response_format fallback
         body = self._build_request_body(system_prompt, user_content, include_response_format=True)
 
         try:
-            return self._send_request(body)
+            return await self._send_request(body)
         except Exception as exc:
             if self._is_response_format_error(exc):
                 logger.warning(
@@ -430,7 +479,7 @@ class LLMExtractor:
                 fallback_body = self._build_request_body(
                     system_prompt, user_content, include_response_format=False
                 )
-                return self._send_request(fallback_body, fallback_label="[fallback] ")
+                return await self._send_request(fallback_body, fallback_label="[fallback] ")
             raise
 
     def _merge_extracted_fields(
@@ -481,8 +530,9 @@ class LLMExtractor:
         image_blocks: List[Dict[str, Any]] = []
 
         if settings.llm_send_images:
+            # Image reads + base64 encodes are blocking file work
             image_blocks, images_attached, total_image_bytes, total_image_tokens_est = (
-                self._build_image_content_blocks(image_paths, image_path)
+                await asyncio.to_thread(self._build_image_content_blocks, image_paths, image_path)
             )
         else:
             img_count = len(image_paths or ([image_path] if image_path else []))
@@ -537,7 +587,7 @@ class LLMExtractor:
                     # Plain text — matches the SSI extraction pattern
                     user_content = user_text
 
-                result_text = self._call_llm(system_prompt, user_content, on_progress=on_progress)
+                result_text = await self._call_llm(system_prompt, user_content, on_progress=on_progress)
 
                 # Strip markdown code fences if present (some LLMs wrap JSON in ```json...```)
                 cleaned = result_text.strip()
@@ -608,6 +658,22 @@ class LLMExtractor:
             logger.error("=" * 60)
             return self._mock_extraction(content)
 
+    async def extract_many(
+        self,
+        jobs: List[Dict[str, Any]],
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ) -> List[ExtractedTrade]:
+        """Extract a batch of documents concurrently.
+
+        Each job is a kwargs dict for extract_trade_data (content,
+        image_path, image_paths, ...). Requests fan out together and the
+        in-flight semaphore keeps at most llm_max_concurrent_requests
+        against the API; results come back in job order.
+        """
+        return await asyncio.gather(
+            *(self.extract_trade_data(on_progress=on_progress, **job) for job in jobs)
+        )
+
     def _build_extraction_prompt(self) -> str:
         field_lines: List[str] = []
         for field in self.schema.get("fields", []):
@@ -690,22 +756,25 @@ class LLMExtractor:
         return normalized
 
     def _mock_extraction(self, content: str) -> ExtractedTrade:
+        # One split shared by every field helper; previously each of the
+        # ~15 lookups below re-split the full document into lines.
+        lines = content.split("\n")
         field_map = {
-            "trade_id": self._extract_pattern(content, [r"trade\s*id", r"trade\s*ref", r"reference"]),
-            "party_a": self._extract_pattern(content, [r"party\s*a", r"our\s*bank", r"return\s*swap\s*receiver\s*party\s*a"]),
-            "party_b": self._extract_pattern(content, [r"party\s*b", r"counterparty"]),
-            "trade_date": self._extract_date_for_label(content, [r"trade\s*date"]),
-            "effective_date": self._extract_date_for_label(content, [r"effective\s*date", r"start\s*date"]),
-            "scheduled_termination_date": self._extract_date_for_label(content, [r"scheduled\s*termination\s*date", r"termination\s*date", r"maturity\s*date"]),
-            "bond_return_payer": self._normalize_party_flag(self._extract_pattern(content, [r"bond\s*return\s*payer"])),
-            "bond_return_receiver": self._normalize_party_flag(self._extract_pattern(content, [r"bond\s*return\s*receiver"])),
-            "local_currency": self._extract_currency(content, [r"local\s*currency", r"currency"]),
-            "notional_amount": self._extract_number_for_label(content, [r"notional\s*amount", r"local\s*notional"]),
-            "usd_notional_amount": self._extract_number_for_label(content, [r"usd\s*notional\s*amount", r"usd\s*notional"]),
-            "initial_spot_rate": self._extract_number_for_label(content, [r"initial\s*spot\s*rate", r"spot\s*rate"]),
-            "current_market_price": self._extract_number_for_label(content, [r"current\s*market\s*price", r"market\s*price"]),
-            "underlier": self._extract_pattern(content, [r"underlier", r"reference\s*bond", r"reference\s*asset"]),
-            "isin": self._extract_pattern(content, [r"isin"]),
+            "trade_id": self._extract_pattern(lines, [r"trade\s*id", r"trade\s*ref", r"reference"]),
+            "party_a": self._extract_pattern(lines, [r"party\s*a", r"our\s*bank", r"return\s*swap\s*receiver\s*party\s*a"]),
+            "party_b": self._extract_pattern(lines, [r"party\s*b", r"counterparty"]),
+            "trade_date": self._extract_date_for_label(lines, content, [r"trade\s*date"]),
+            "effective_date": self._extract_date_for_label(lines, content, [r"effective\s*date", r"start\s*date"]),
+            "scheduled_termination_date": self._extract_date_for_label(lines, content, [r"scheduled\s*termination\s*date", r"termination\s*date", r"maturity\s*date"]),
+            "bond_return_payer": self._normalize_party_flag(self._extract_pattern(lines, [r"bond\s*return\s*payer"])),
+            "bond_return_receiver": self._normalize_party_flag(self._extract_pattern(lines, [r"bond\s*return\s*receiver"])),
+            "local_currency": self._extract_currency(lines, content, [r"local\s*currency", r"currency"]),
+            "notional_amount": self._extract_number_for_label(lines, [r"notional\s*amount", r"local\s*notional"]),
+            "usd_notional_amount": self._extract_number_for_label(lines, [r"usd\s*notional\s*amount", r"usd\s*notional"]),
+            "initial_spot_rate": self._extract_number_for_label(lines, [r"initial\s*spot\s*rate", r"spot\s*rate"]),
+            "current_market_price": self._extract_number_for_label(lines, [r"current\s*market\s*price", r"market\s*price"]),
+            "underlier": self._extract_pattern(lines, [r"underlier", r"reference\s*bond", r"reference\s*asset"]),
+            "isin": self._extract_pattern(lines, [r"isin"]),
         }
 
         output: Dict[str, ExtractedField] = {}
@@ -726,22 +795,19 @@ class LLMExtractor:
             raw_text=content,
         )
 
-    def _extract_pattern(self, content: str, labels: List[str]) -> Optional[str]:
-        lines = content.split("\n")
+    def _extract_pattern(self, lines: List[str], labels: List[str]) -> Optional[str]:
         for line in lines:
             for label in labels:
-                pattern = rf"\b{label}\b\s*[:\-]\s*(.+)$"
-                match = re.search(pattern, line, flags=re.IGNORECASE)
+                match = _label_value_re(label).search(line)
                 if match:
                     return match.group(1).strip()
         return None
 
-    def _extract_number_for_label(self, content: str, labels: List[str]) -> Optional[float]:
-        lines = content.split("\n")
+    def _extract_number_for_label(self, lines: List[str], labels: List[str]) -> Optional[float]:
         for line in lines:
             for label in labels:
-                if re.search(rf"\b{label}\b", line, flags=re.IGNORECASE):
-                    number_match = re.search(r"([-+]?\d[\d,]*\.?\d*)", line)
+                if _label_re(label).search(line):
+                    number_match = _NUMBER_RE.search(line)
                     if number_match:
                         try:
                             return float(number_match.group(1).replace(",", ""))
@@ -749,24 +815,22 @@ class LLMExtractor:
                             return None
         return None
 
-    def _extract_currency(self, content: str, labels: List[str]) -> Optional[str]:
-        maybe_value = self._extract_pattern(content, labels)
+    def _extract_currency(self, lines: List[str], content: str, labels: List[str]) -> Optional[str]:
+        maybe_value = self._extract_pattern(lines, labels)
         if maybe_value:
-            match = re.search(r"\b([A-Z]{3})\b", maybe_value.upper())
+            match = _CCY_CODE_RE.search(maybe_value.upper())
             if match:
                 return match.group(1)
 
-        match = re.search(r"\b(USD|EUR|GBP|JPY|CHF|AUD|CAD|INR|SGD|HKD)\b", content.upper())
+        match = _KNOWN_CCY_RE.search(content.upper())
         if match:
             return match.group(1)
         return None
 
-    def _extract_date_for_label(self, content: str, labels: List[str]) -> Optional[str]:
-        lines = content.split("\n")
-
+    def _extract_date_for_label(self, lines: List[str], content: str, labels: List[str]) -> Optional[str]:
         for line in lines:
             for label in labels:
-                if re.search(rf"\b{label}\b", line, flags=re.IGNORECASE):
+                if _label_re(label).search(line):
                     parsed = self._parse_date(line)
                     if parsed:
                         return parsed
@@ -775,14 +839,8 @@ class LLMExtractor:
         return parsed_any
 
     def _parse_date(self, text: str) -> Optional[str]:
-        patterns = [
-            r"(\d{4}-\d{2}-\d{2})",
-            r"(\d{2}/\d{2}/\d{4})",
-            r"(\d{2}-\d{2}-\d{4})",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _DATE_RES:
+            match = pattern.search(text)
             if not match:
                 continue
 
@@ -1,9 +1,12 @@
 import logging
+import os
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api import router
 from app.config import settings
+from app.db import db
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,7 +17,8 @@ logging.basicConfig(
 app = FastAPI(
     title=settings.app_name,
     description="Markets Trade Validator API - Extract and validate confirmation evidence using LLM",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,  # orjson serializes large list payloads in C
 )
 
 # Configure CORS for frontend
@@ -30,6 +34,19 @@ app.add_middleware(
 app.include_router(router, prefix="/api")
 
 
+@app.on_event("startup")
+async def ensure_data_dirs():
+    # Created here rather than at config import so every module that pulls
+    # in settings doesn't pay the stat+mkdir syscalls per worker
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    os.makedirs(settings.ingest_scan_dir, exist_ok=True)
+
+
+@app.on_event("shutdown")
+async def flush_database():
+    db.flush()
+
+
 @app.get("/")
 async def root():
     return {
@@ -46,4 +63,4 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
@@ -64,15 +64,37 @@ export function ChatBubble({ validationResults }: ChatBubbleProps) {
         }),
       });
 
-      if (response.ok) {
-        const data = await response.json();
-        const assistantMessage: Message = {
-          id: (Date.now() + 1).toString(),
+      if (response.ok && response.body) {
+        const assistantId = (Date.now() + 1).toString();
+        setMessages(prev => [...prev, {
+          id: assistantId,
           role: 'assistant',
-          content: data.response,
+          content: '',
           timestamp: new Date(),
-        };
-        setMessages(prev => [...prev, assistantMessage]);
+        }]);
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        for (;;) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          const lines = buffer.split('\n\n');
+          buffer = lines.pop() ?? '';
+
+          for (const line of lines) {
+            if (!line.startsWith('data: ')) continue;
+            const event = JSON.parse(line.slice(6));
+            if (event.type === 'token' && event.text) {
+              setMessages(prev => prev.map(m =>
+                m.id === assistantId ? { ...m, content: m.content + event.text } : m
+              ));
+            }
+          }
+        }
       } else {
         throw new Error('Failed to get response');
       }
@@ -20,6 +20,11 @@ echo "Initializing sample data..."
 python init_data.py
 
 # Start the server
+# uvicorn[standard] ships uvloop + httptools; select them explicitly so the
+# async endpoints run on the faster loop/parser. Single worker only: the
+# JSON store keeps authoritative rows in process memory with a debounced
+# flush, and the matching rules install into a process-local engine, so
+# multiple workers would race whole-file writes and serve stale rules.
 echo "Starting FastAPI server on http://localhost:8000"
 echo "API docs available at http://localhost:8000/docs"
-uvicorn main:app --reload --host 0.0.0.0 --port 8000
+uvicorn main:app --reload --host 0.0.0.0 --port 8000 --loop uvloop --http httptools